@@ -25,7 +25,7 @@
 # SOFTWARE.
 
 from typing import List  # noqa: F401
-from config import keys, mod, autostart, groups, layouts, floating_layout, screens, mouse
+from config import keys, mod, groups, layouts, floating_layout, screens, mouse
 
 
 dgroups_key_binder = None
@@ -50,5 +50,3 @@ auto_minimize = True
 # We choose LG3D to maximize irony: it is a 3D non-reparenting WM written in
 # java that happens to be on java's whitelist.
 wmname = "LG3D"
-
-autostart()
@@ -1,5 +1,15 @@
+from . import profile, reload
+
+if profile.enabled():
+    profile.start()
+
 from .mappings import keys, mod, mouse
 from .autostart import autostart
 from .groups import groups
 from .layouts import layouts, floating_layout
 from .screens import screens
+reload.remember(screens)
+
+if profile.enabled():
+    profile.stop()
+    profile.save()
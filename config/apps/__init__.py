@@ -1 +1 @@
-from .print import screenshots
+from .print import burst, screenshots
@@ -0,0 +1,134 @@
+"""
+Backlight control by writing to /sys/class/backlight directly.
+
+Key presses only change the target brightness. The target is written at most once per
+frame, so holding a brightness key writes once per frame rather than once per key
+repeat, and presses that arrive while a write is still going are written together
+afterwards. If the brightness file is not writable, brightnessctl (or helper) is run to
+set it instead; it is usually installed with permission to do so.
+
+Listeners are called with the new brightness and the maximum brightness after every
+write.
+"""
+import asyncio
+import os
+import shlex
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from libqtile import qtile
+from libqtile.lazy import lazy
+from libqtile.log_utils import logger
+
+BACKLIGHT_DIR = '/sys/class/backlight'
+
+
+def _default_device():
+    try:
+        devices = sorted(os.listdir(BACKLIGHT_DIR))
+    except OSError:
+        return None
+    return devices[0] if devices else None
+
+
+class Backlight:
+    def __init__(self, device=None, step=5, minimum=1, frame=1 / 60,
+                 helper='brightnessctl --device={device} set {value}'):
+        self.name = device or _default_device()
+        self.step = step
+        self.minimum = minimum
+        self.frame = frame
+        self.helper = helper
+        self.listeners = []
+        self.brightness = None
+        self.max_brightness = None
+        self._target = None
+        # The value being written, until the write is done.
+        self._pending = None
+        self._handle = None
+        self._writing = None
+        self._executor = ThreadPoolExecutor(max_workers=1)
+
+    def _path(self, name):
+        return os.path.join(BACKLIGHT_DIR, self.name, name)
+
+    def _read(self):
+        with open(self._path('max_brightness')) as f:
+            self.max_brightness = int(f.read())
+        with open(self._path('brightness')) as f:
+            self.brightness = int(f.read())
+
+    def change(self, percent):
+        """
+        Change the brightness by a percentage of the maximum.
+        """
+        if self.name is None:
+            return
+        if self._target is None and self._writing is None:
+            # Start each burst of presses from the current value, in case something
+            # else has changed it.
+            try:
+                self._read()
+            except (OSError, ValueError) as e:
+                logger.warning(f'Could not read backlight {self.name}: {e}')
+                return
+
+        current = self._latest() if self._target is None else self._target
+        target = current + round(self.max_brightness * percent / 100)
+        self._target = max(self.minimum, min(self.max_brightness, target))
+        if self._handle is None and self._writing is None:
+            self._handle = qtile.call_later(self.frame, self._flush)
+
+    def up(self, qtile=None):
+        self.change(self.step)
+
+    def down(self, qtile=None):
+        self.change(-self.step)
+
+    def __getattr__(self, name):
+        if name.startswith('lazy_'):
+            return lazy.function(getattr(self, name[5:]))
+        raise AttributeError(name)
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+
+    def _latest(self):
+        """The brightness as it will be once the write in progress, if any, is done"""
+        return self.brightness if self._pending is None else self._pending
+
+    def _flush(self):
+        self._handle = None
+        if self._target is None or self._target == self._latest():
+            self._target = None
+            return
+        target, self._target = self._target, None
+        self._pending = target
+        loop = asyncio.get_event_loop()
+        self._writing = loop.run_in_executor(self._executor, self._write, target)
+        self._writing.add_done_callback(self._written)
+
+    def _write(self, value):
+        try:
+            with open(self._path('brightness'), 'w') as f:
+                f.write(str(value))
+        except PermissionError:
+            command = self.helper.format(device=self.name, value=value)
+            subprocess.run(shlex.split(command), check=True, capture_output=True)
+        return value
+
+    def _written(self, future):
+        self._writing = None
+        self._pending = None
+        try:
+            self.brightness = future.result()
+        except Exception as e:
+            logger.warning(f'Could not set backlight {self.name}: {e}')
+        else:
+            for listener in self.listeners:
+                listener(self.brightness, self.max_brightness)
+        if self._target is not None:
+            self._handle = qtile.call_later(self.frame, self._flush)
+
+
+backlight = Backlight()
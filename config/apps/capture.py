@@ -0,0 +1,74 @@
+import struct
+import threading
+import zlib
+
+import xcffib
+import xcffib.xproto
+
+
+_local = threading.local()
+
+
+def _connection():
+    """
+    Each thread that captures keeps its own connection to the X server, so grabbing
+    never goes through (or blocks) Qtile's connection.
+    """
+    conn = getattr(_local, 'conn', None)
+    if conn is None or conn.has_error():
+        conn = _local.conn = xcffib.connect()
+    return conn
+
+
+def grab(x=0, y=0, width=None, height=None):
+    """Grabs part of the root window, or all of it, with GetImage
+
+    Returns the width, height and pixels of the image as 8 bit RGB.
+    """
+    conn = _connection()
+    setup = conn.get_setup()
+    screen = setup.roots[conn.pref_screen]
+    if width is None or height is None:
+        x, y = 0, 0
+        width, height = screen.width_in_pixels, screen.height_in_pixels
+
+    reply = conn.core.GetImage(
+        xcffib.xproto.ImageFormat.ZPixmap, screen.root, x, y, width, height, 0xffffffff
+    ).reply()
+    bpp = next(f.bits_per_pixel for f in setup.pixmap_formats if f.depth == reply.depth)
+    if bpp != 32 or reply.depth not in (24, 32):
+        raise ValueError(f'Unsupported pixel format: depth {reply.depth}, {bpp} bpp')
+
+    data = reply.data.buf()
+    rgb = bytearray(width * height * 3)
+    if setup.image_byte_order == xcffib.xproto.ImageOrder.LSBFirst:
+        rgb[0::3], rgb[1::3], rgb[2::3] = data[2::4], data[1::4], data[0::4]
+    else:
+        rgb[0::3], rgb[1::3], rgb[2::3] = data[1::4], data[2::4], data[3::4]
+    return width, height, bytes(rgb)
+
+
+def _chunk(kind, data):
+    return (
+        struct.pack('>I', len(data)) + kind + data
+        + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+    )
+
+
+def encode_png(width, height, rgb, level=3):
+    """Encodes 8 bit RGB pixels as a PNG
+
+    zlib releases the GIL while compressing, so this is cheap to run in a thread.
+    """
+    stride = width * 3
+    raw = bytearray((stride + 1) * height)
+    for row in range(height):
+        start = row * (stride + 1) + 1
+        raw[start:start + stride] = rgb[row * stride:(row + 1) * stride]
+
+    return b''.join((
+        b'\x89PNG\r\n\x1a\n',
+        _chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)),
+        _chunk(b'IDAT', zlib.compress(bytes(raw), level)),
+        _chunk(b'IEND', b''),
+    ))
@@ -1,24 +1,236 @@
+import asyncio
+import collections
+import os
+import subprocess
+import threading
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
 from libqtile.lazy import lazy
 from libqtile.log_utils import logger
-from datetime import datetime
+
+from . import capture
 from .user import User
 
+# Grabbing and encoding happen in one worker so Qtile's event loop never waits on them.
+_executor = ThreadPoolExecutor(max_workers=1)
+# Bursts grab in that worker and encode frames here, so grabbing keeps to its interval.
+_encoders = ThreadPoolExecutor(max_workers=max(1, min(4, (os.cpu_count() or 2) - 1)))
+_PNG_LEVEL = 3
+_burst = None
+
 
-def screenshots(selection: bool=False, clipboard: bool=False) -> None:
+def screenshots(selection: bool=False, clipboard: bool=False):
     """Takes a usual screeshot
+
+    Returns a lazy command for a key binding. The screen is grabbed in-process, and
+    with selection the region is picked with slop first. maim is used instead if the
+    screen can't be grabbed directly.
     """
-    global count
+    return lazy.function(_screenshot, selection, clipboard)
+
+
+def _screenshot(qtile, selection: bool, clipboard: bool) -> None:
     now = datetime.now()
     nowfmt = now.strftime("%Y.%m.%d-%H.%M.%S")
-    maim_args = '-u -b 3 -m 5'
     filename = User.Dirs.Screenshots.joinpath(f'{nowfmt}.screenshot.png')
-    logger.warning(filename)
+    logger.debug(f'\n{filename = }\n{selection = }\n {clipboard = }\n')
+    asyncio.ensure_future(_take(filename, selection, clipboard))
+
 
-    if selection:
+async def _select():
+    """Asks for a region with slop, returning (x, y, width, height) or None"""
+    proc = await asyncio.create_subprocess_exec(
+        'slop', '-b', '3', '-f', '%x %y %w %h',
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.DEVNULL,
+    )
+    stdout, _ = await proc.communicate()
+    if proc.returncode:
+        return None
+    return tuple(int(v) for v in stdout.split())
+
+
+def _save(filename: Path, region: tuple, clipboard: bool) -> None:
+    png = capture.encode_png(*capture.grab(*region), level=_PNG_LEVEL)
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    filename.write_bytes(png)
+    if clipboard:
+        _copy(filename)
+
+
+def _copy(filename: Path) -> None:
+    subprocess.Popen(
+        ['xclip', '-selection', 'clipboard', '-t', 'image/png', str(filename)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+def _maim(filename: Path, selection: bool, region: tuple, clipboard: bool) -> None:
+    maim_args = '-u -b 3 -m 5'
+    if region:
+        x, y, width, height = region
+        maim_args += f' -g {width}x{height}+{x}+{y}'
+    elif selection:
         maim_args += ' -s'
 
     cmd = f'maim {maim_args} {filename}'
     if clipboard:
         cmd += f' && xclip -selection clipboard -t image/png {filename} &>/dev/null'
-    logger.warning(f'\n{filename = }\n{cmd = }\n{selection = }\n {clipboard = }\n')
-    lazy.spawn(cmd)
+    logger.debug(f'\n{cmd = }\n')
+    subprocess.Popen(cmd, shell=True)
+
+
+async def _take(filename: Path, selection: bool, clipboard: bool) -> None:
+    loop = asyncio.get_event_loop()
+    region = ()
+    try:
+        if selection:
+            region = await _select()
+            if region is None:
+                return
+        await loop.run_in_executor(_executor, _save, filename, region, clipboard)
+    except Exception as e:
+        logger.warning(f'Could not grab the screen, falling back to maim: {e}')
+        _maim(filename, selection, region, clipboard)
+
+
+class _Burst:
+    """A run of screenshots taken every interval seconds into one directory
+
+    Grabbed frames wait in a ring until an encoder is free. The ring holds at most
+    ring_bytes of pixels, and when a new frame takes it over that, the oldest frames
+    still waiting are dropped, so a slow disk can't make Qtile hold on to more memory.
+    With dedup, a frame identical to the one before it is not saved.
+    """
+    def __init__(self, directory: Path, count, interval: float, region: tuple,
+                 ring_bytes: int, dedup: bool, clipboard: bool):
+        self.directory = directory
+        self.count = count
+        self.interval = interval
+        self.region = region
+        self.dedup = dedup
+        self.clipboard = clipboard
+        self.ring = collections.deque()
+        self.ring_bytes = ring_bytes
+        self.frames = 0
+        self.dropped = 0
+        self.duplicates = 0
+        self.stopped = False
+        self._last = None
+        self.saved = 0
+        # Only the encodes still running, finished ones are counted and let go.
+        self._encoding = set()
+        self._newest = None
+        self._bytes = 0
+        # The ring is added to on the event loop and taken from by the encoders.
+        self._lock = threading.Lock()
+
+    def _grab(self):
+        frame = capture.grab(*self.region)
+        return frame, zlib.crc32(frame[2]) if self.dedup else None
+
+    def _push(self, index, frame) -> None:
+        with self._lock:
+            self.ring.append((index, frame))
+            self._bytes += len(frame[2])
+            # Always keep the newest frame, even if it alone is over the budget.
+            while self._bytes > self.ring_bytes and len(self.ring) > 1:
+                _, oldest = self.ring.popleft()
+                self._bytes -= len(oldest[2])
+                self.dropped += 1
+
+    def _encode(self):
+        with self._lock:
+            if not self.ring:
+                # The frame this job was started for was dropped.
+                return None
+            index, frame = self.ring.popleft()
+            self._bytes -= len(frame[2])
+        filename = self.directory.joinpath(f'{index:04d}.png')
+        filename.write_bytes(capture.encode_png(*frame, level=_PNG_LEVEL))
+        return index, filename
+
+    def _encoded(self, future):
+        self._encoding.discard(future)
+        try:
+            saved = future.result()
+        except Exception as e:
+            logger.exception(f'Could not save a burst frame: {e}')
+            return
+        if saved is not None:
+            self.saved += 1
+            if self._newest is None or saved > self._newest:
+                self._newest = saved
+
+    async def run(self) -> None:
+        loop = asyncio.get_event_loop()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tick = loop.time()
+        while not self.stopped and (self.count is None or self.frames < self.count):
+            frame, digest = await loop.run_in_executor(_executor, self._grab)
+            if self.dedup and digest == self._last:
+                self.duplicates += 1
+            else:
+                self._last = digest
+                self.frames += 1
+                self._push(self.frames, frame)
+                encoding = loop.run_in_executor(_encoders, self._encode)
+                encoding.add_done_callback(self._encoded)
+                self._encoding.add(encoding)
+            del frame
+
+            tick += self.interval
+            now = loop.time()
+            if tick < now:
+                # A slow grab skips the ticks it missed rather than catching up on them.
+                tick = now
+            await asyncio.sleep(tick - now)
+
+        await asyncio.gather(*self._encoding, return_exceptions=True)
+        logger.info(
+            f'Burst saved {self.saved} of {self.frames} frames to '
+            f'{self.directory}, skipped {self.duplicates} duplicates and dropped '
+            f'{self.dropped} frames'
+        )
+        if self.clipboard and self._newest is not None:
+            _copy(self._newest[1])
+
+
+def burst(count: int=None, interval: float=0.2, selection: bool=False,
+          clipboard: bool=False, ring_bytes: int=256 * 2 ** 20, dedup: bool=True):
+    """Takes a screenshot every interval seconds
+
+    Returns a lazy command for a key binding. Frames are saved as numbered PNGs in a
+    new directory under the screenshots directory. Without a count, the burst goes on
+    until the binding is pressed again, which also stops a counted burst early. With
+    clipboard the last frame is copied. At most ring_bytes of frames wait to be encoded.
+    """
+    return lazy.function(_toggle_burst, count, interval, selection, clipboard,
+                         ring_bytes, dedup)
+
+
+def _toggle_burst(qtile, count, interval, selection, clipboard, ring_bytes, dedup):
+    global _burst
+    if _burst is not None and not _burst.stopped:
+        _burst.stopped = True
+        return
+
+    nowfmt = datetime.now().strftime("%Y.%m.%d-%H.%M.%S")
+    directory = User.Dirs.Screenshots.joinpath(f'{nowfmt}.burst')
+    _burst = _Burst(directory, count, interval, (), ring_bytes, dedup, clipboard)
+    asyncio.ensure_future(_run_burst(_burst, selection))
+
+
+async def _run_burst(run: _Burst, selection: bool) -> None:
+    try:
+        if selection:
+            run.region = await _select()
+            if run.region is None:
+                return
+        await run.run()
+    except Exception as e:
+        logger.exception(f'Screenshot burst failed: {e}')
+    finally:
+        run.stopped = True
@@ -0,0 +1,293 @@
+"""
+Volume control for the default PulseAudio (or PipeWire) sink without a process per key
+press.
+
+With pulsectl installed, one connection to the server is kept open for changing the
+volume and a second one listens for events. Without it, pactl is still spawned to
+change the volume, but a single long-running `pactl subscribe` replaces polling, and
+while it runs the last state read is reused until it reports a change, so a key press
+only spawns the one command that changes what it changes.
+
+Key presses that arrive while a change is still being made are added together and
+applied as one change. Whenever the volume or mute state changes, from a key press or
+any other program, listeners are called with the new volume in percent and whether the
+sink is muted. server can name another server, such as a local test server.
+
+If listening for events fails, it is retried on the next change after a delay that
+doubles with each failure, up to five minutes.
+"""
+import asyncio
+import re
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from libqtile import hook
+from libqtile.lazy import lazy
+from libqtile.log_utils import logger
+
+
+class _Pulsectl:
+    def __init__(self, server):
+        import pulsectl
+        self.pulsectl = pulsectl
+        self.server = server
+        self.pulse = pulsectl.Pulse('qtile-volume', server=server)
+
+    def _sink(self):
+        return self.pulse.get_sink_by_name(self.pulse.server_info().default_sink_name)
+
+    def get(self):
+        sink = self._sink()
+        return round(sink.volume.value_flat * 100), bool(sink.mute)
+
+    def set(self, volume=None, muted=None):
+        sink = self._sink()
+        if volume is not None:
+            self.pulse.volume_set_all_chans(sink, volume / 100)
+        if muted is not None:
+            self.pulse.mute(sink, muted)
+
+    def listen(self, notify, running):
+        def stop(event):
+            raise self.pulsectl.PulseLoopStop
+
+        with self.pulsectl.Pulse('qtile-volume-events', server=self.server) as pulse:
+            pulse.event_mask_set('sink', 'server')
+            pulse.event_callback_set(stop)
+            while running.is_set():
+                pulse.event_listen()
+                notify()
+
+    def close(self):
+        self.pulse.close()
+
+
+class _Pactl:
+    _events = re.compile(r"on (sink|server) ")
+
+    def __init__(self, server):
+        self.command = ['pactl']
+        if server:
+            self.command.extend(['--server', server])
+        self._subscribe = None
+        # The volume and mute state last read or set, kept while listening for events
+        # and forgotten whenever one arrives.
+        self._state = None
+        self._listening = False
+
+    def _run(self, *commands):
+        """Run the pactl commands at the same time, returning their outputs"""
+        processes = [
+            subprocess.Popen(
+                self.command + list(args),
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            for args in commands
+        ]
+        outputs = []
+        for process in processes:
+            stdout, stderr = process.communicate()
+            if process.returncode:
+                raise subprocess.CalledProcessError(
+                    process.returncode, process.args, stdout, stderr
+                )
+            outputs.append(stdout)
+        return outputs
+
+    def get(self):
+        # The listener can forget the state at any time, so it is only read once.
+        state = self._state
+        if state is not None:
+            return state
+        volume, muted = self._run(
+            ('get-sink-volume', '@DEFAULT_SINK@'), ('get-sink-mute', '@DEFAULT_SINK@')
+        )
+        volume = re.search(r'(\d+)%', volume)
+        state = int(volume.group(1)) if volume else 0, 'yes' in muted
+        if self._listening:
+            self._state = state
+        return state
+
+    def set(self, volume=None, muted=None):
+        commands = []
+        if volume is not None:
+            commands.append(('set-sink-volume', '@DEFAULT_SINK@', f'{volume}%'))
+        if muted is not None:
+            commands.append(('set-sink-mute', '@DEFAULT_SINK@', str(int(muted))))
+        self._run(*commands)
+        state = self._state
+        if state is not None:
+            old_volume, old_muted = state
+            self._state = (
+                old_volume if volume is None else volume,
+                old_muted if muted is None else muted,
+            )
+
+    def listen(self, notify, running):
+        self._subscribe = subprocess.Popen(
+            self.command + ['subscribe'], stdout=subprocess.PIPE, text=True
+        )
+        self._listening = True
+        try:
+            for line in self._subscribe.stdout:
+                if not running.is_set():
+                    break
+                if self._events.search(line):
+                    self._state = None
+                    notify()
+        finally:
+            self._listening = False
+            self._state = None
+
+    def close(self):
+        if self._subscribe is not None:
+            self._subscribe.terminate()
+
+
+_MAX_BACKOFF = 300
+
+
+class PulseVolume:
+    def __init__(self, step=5, limit=100, server=None, backend=None):
+        self.step = step
+        self.limit = limit
+        self.server = server
+        self.volume = None
+        self.muted = None
+        self.listeners = []
+        self._backend = backend
+        # The backend is only ever used from this thread, pulsectl is not thread safe.
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._running = threading.Event()
+        self._failures = 0
+        self._retry_at = 0.0
+        self._delta = 0
+        self._toggles = 0
+        self._stale = False
+        self._task = None
+        hook.subscribe.shutdown(self.stop)
+
+    def _connect(self):
+        if self._backend is None:
+            try:
+                self._backend = _Pulsectl(self.server)
+            except Exception as e:
+                logger.info(f'Using pactl for volume control: {e!r}')
+                self._backend = _Pactl(self.server)
+        return self._backend
+
+    def start(self):
+        """
+        Start listening for volume changes. This is done the first time the volume is
+        changed or a listener is added, and again after listening failed once its
+        backoff has passed.
+        """
+        if self._running.is_set() or time.monotonic() < self._retry_at:
+            return
+        self._running.set()
+        loop = asyncio.get_event_loop()
+
+        def notify():
+            loop.call_soon_threadsafe(self.refresh)
+
+        def listen():
+            started = time.monotonic()
+            try:
+                backend = self._executor.submit(self._connect).result()
+                backend.listen(notify, self._running)
+            except Exception as e:
+                logger.exception(f'Stopped listening for volume changes: {e}')
+            if self._running.is_set():
+                # Not stopped, so listening failed, or the server went away.
+                if time.monotonic() - started > _MAX_BACKOFF:
+                    self._failures = 0
+                self._failures += 1
+                self._retry_at = time.monotonic() + min(
+                    _MAX_BACKOFF, 2 ** self._failures
+                )
+            self._running.clear()
+
+        threading.Thread(target=listen, name='pulse-events', daemon=True).start()
+        self.refresh()
+
+    def stop(self):
+        self._running.clear()
+        if self._backend is not None:
+            self._backend.close()
+
+    def subscribe(self, listener):
+        self.listeners.append(listener)
+        if self.volume is not None:
+            listener(self.volume, self.muted)
+        self.start()
+
+    def change(self, delta):
+        self._delta += delta
+        self._kick()
+
+    def toggle_mute(self):
+        self._toggles += 1
+        self._kick()
+
+    def refresh(self):
+        self._stale = True
+        self._kick()
+
+    def up(self, qtile=None):
+        self.change(self.step)
+
+    def down(self, qtile=None):
+        self.change(-self.step)
+
+    def mute(self, qtile=None):
+        self.toggle_mute()
+
+    def __getattr__(self, name):
+        if name.startswith('lazy_'):
+            return lazy.function(getattr(self, name[5:]))
+        raise AttributeError(name)
+
+    def _kick(self):
+        self.start()
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._apply())
+
+    async def _apply(self):
+        loop = asyncio.get_event_loop()
+        while self._delta or self._toggles or self._stale:
+            delta, self._delta = self._delta, 0
+            toggle, self._toggles = self._toggles % 2 == 1, 0
+            self._stale = False
+            try:
+                state = await loop.run_in_executor(
+                    self._executor, self._apply_sync, delta, toggle
+                )
+            except Exception as e:
+                logger.exception(f'Could not change the volume: {e}')
+                return
+            self._publish(*state)
+
+    def _apply_sync(self, delta, toggle):
+        backend = self._connect()
+        volume, muted = backend.get()
+        if delta or toggle:
+            changed = max(0, min(self.limit, volume + delta))
+            if changed != volume or toggle:
+                backend.set(
+                    changed if changed != volume else None,
+                    not muted if toggle else None,
+                )
+            volume, muted = changed, muted != toggle
+        return volume, muted
+
+    def _publish(self, volume, muted):
+        if (volume, muted) == (self.volume, self.muted):
+            return
+        self.volume, self.muted = volume, muted
+        for listener in self.listeners:
+            listener(volume, muted)
+
+
+volume = PulseVolume()
@@ -1,8 +1,114 @@
+"""
+Programs started once when Qtile starts.
+
+Each Entry is started as soon as the entries it comes after are ready, so independent
+programs start in parallel and nothing blocks Qtile's startup. An entry is ready once it
+has been started, or when ready is 'exit', once it has exited successfully. ready can
+also be a function that is polled until it returns True, such as selection_owned().
+
+The time each entry waited, took to start and took to become ready is logged, and
+timings() returns them.
+"""
+import asyncio
 import os
-import subprocess
-from libqtile import hook
+import shlex
+import time
+
+from libqtile import hook, qtile
+from libqtile.log_utils import logger
+
+
+class Entry:
+    def __init__(self, name, command, after=(), ready=None, timeout=10):
+        self.name = name
+        self.command = command
+        self.after = tuple(after)
+        self.ready = ready
+        self.timeout = timeout
+
+
+def selection_owned(selection):
+    """A readiness check for programs that own an X selection, such as a compositor"""
+    def check():
+        conn = qtile.core.conn
+        reply = conn.conn.core.GetSelectionOwner(conn.atoms[selection]).reply()
+        return bool(reply.owner)
+    return check
+
+
+entries = [
+    Entry('setxkbmap', "setxkbmap -layout br -variant abnt2 -option 'ctrl:swapcaps' "
+                       "-option 'numpad:microsoft'", ready='exit'),
+    Entry('fehbg', '~/.fehbg', ready='exit'),
+    Entry('polkit', '/usr/lib/polkit-gnome/polkit-gnome-authentication-agent-1'),
+    Entry('keyring', 'gnome-keyring-daemon'),
+    Entry('picom', 'picom --experimental-backend', after=['fehbg'],
+          ready=selection_owned('_NET_WM_CM_S0')),
+]
+
+_timings = {}
+
+
+def timings():
+    """Seconds from startup until each entry was started and was ready"""
+    return dict(_timings)
+
+
+async def _wait_ready(entry, proc):
+    if entry.ready is None:
+        return True
+    if entry.ready == 'exit':
+        return await asyncio.wait_for(proc.wait(), entry.timeout) == 0
+
+    deadline = time.monotonic() + entry.timeout
+    while not entry.ready():
+        if proc.returncode is not None or time.monotonic() > deadline:
+            return False
+        await asyncio.sleep(0.05)
+    return True
+
+
+async def _start(entry, after, begin):
+    for name in after:
+        if not await after[name]:
+            logger.warning(f'autostart: not starting {entry.name}, {name} failed')
+            return False
+
+    waited = time.monotonic() - begin
+    args = shlex.split(entry.command)
+    args[0] = os.path.expanduser(args[0])
+    try:
+        proc = await asyncio.create_subprocess_exec(*args)
+        spawned = time.monotonic() - begin
+        ok = await _wait_ready(entry, proc)
+    except (OSError, asyncio.TimeoutError) as e:
+        logger.warning(f'autostart: {entry.name} failed: {e!r}')
+        return False
+    ready = time.monotonic() - begin
+
+    if ok:
+        _timings[entry.name] = {'waited': waited, 'started': spawned, 'ready': ready}
+        logger.info(
+            f'autostart: {entry.name} started at {spawned:.3f}s, ready at {ready:.3f}s'
+        )
+    else:
+        logger.warning(f'autostart: {entry.name} was not ready after {ready:.3f}s')
+    return ok
+
+
+async def run(entries):
+    begin = time.monotonic()
+    started = {}
+    for entry in entries:
+        after = {name: started[name] for name in entry.after if name in started}
+        if len(after) < len(entry.after):
+            logger.warning(f'autostart: {entry.name} comes after unknown or later '
+                           f'entries, starting it anyway')
+        started[entry.name] = asyncio.ensure_future(_start(entry, after, begin))
+    await asyncio.gather(*started.values())
+    logger.info(f'autostart: finished in {time.monotonic() - begin:.3f}s')
+
 
 @hook.subscribe.startup_once
 def autostart():
-    home = os.path.expanduser('~/.config/qtile/autostart/autostart.sh')
-    subprocess.call([home])
+    asyncio.ensure_future(run(entries))
@@ -1,4 +1,11 @@
-from libqtile import bar, widget
+from libqtile import widget
+
+from ..apps import backlight, pulse
+from ..mappings import latency
+from .damage import Bar
+from .widgets import (
+    Backlight, Battery, BatteryIcon, Clock, KeyLatency, Memory, Volume
+)
 
 widget_defaults = dict(
     font='Iosevka Custom',
@@ -9,7 +16,7 @@ extension_defaults = widget_defaults.copy()
 
 bar_background = "#1d2021"
 
-bottom_bar = bar.Bar(
+bottom_bar = Bar(
             [
                 widget.CurrentLayout(),
                 widget.Sep(),
@@ -21,25 +28,26 @@ bottom_bar = bar.Bar(
                     },
                     name_transform=lambda name: name.upper(),
                 ),
-                widget.Backlight(),
+                Backlight(controller=backlight.backlight),
                 widget.Sep(),
-                widget.Memory(),
+                Memory(),
                 widget.Sep(),
-                widget.Battery(),
-                widget.BatteryIcon(),
+                Battery(),
+                BatteryIcon(),
                 widget.Sep(),
-                widget.Volume(),
+                Volume(controller=pulse.volume),
                 widget.Sep(),
+                *([KeyLatency(), widget.Sep()] if latency.enabled() else []),
                 widget.Systray(),
                 widget.Sep(),
-                widget.Clock(format='%Y-%m-%d %a %I:%M %p'),
+                Clock(format='%Y-%m-%d %a %I:%M %p'),
                 widget.QuickExit(),
             ],
             24,
             background=bar_background
         )
 
-top_bar = bar.Bar(
+top_bar = Bar(
             [
                 widget.Spacer(),
                 widget.GroupBox(),
@@ -0,0 +1,98 @@
+"""
+A bar that only redraws the widgets that changed.
+
+Qtile redraws every widget in a bar whenever anything calls Bar.draw(). This bar also
+accepts damage(), naming the widgets whose contents changed: if no widget has moved or
+changed size since the last draw, only those widgets are drawn and copied to the bar
+window. Anything else, like an expose event or a widget that calls Bar.draw() itself,
+still redraws the whole bar.
+
+The number of full and partial draws and the area drawn are counted, and the
+damage_info command returns them along with the area drawn per second recently.
+"""
+import collections
+import time
+
+from libqtile import bar
+
+
+class Bar(bar.Bar):
+    # Seconds of draws that area_per_second is averaged over.
+    window = 10
+
+    def __init__(self, widgets, size, **config):
+        bar.Bar.__init__(self, widgets, size, **config)
+        self._damaged = []
+        self._full = True
+        self._geometry = None
+        self._areas = collections.deque()
+        self.full_draws = 0
+        self.partial_draws = 0
+        self.widget_draws = 0
+        self.area = 0
+
+    def damage(self, *widgets):
+        """
+        Draw the given widgets soon, and the rest of the bar only if needed.
+        """
+        for widget in widgets:
+            if widget not in self._damaged:
+                self._damaged.append(widget)
+        if self.queued_draws == 0:
+            self.qtile.call_soon(self._actual_draw)
+        self.queued_draws += 1
+
+    def draw(self):
+        self._full = True
+        bar.Bar.draw(self)
+
+    def _actual_draw(self):
+        full, self._full = self._full, False
+        damaged, self._damaged = self._damaged, []
+        self.queued_draws = 0
+
+        self._resize(self.length, self.widgets)
+        geometry = [(i.offset, i.length) for i in self.widgets]
+        if geometry != self._geometry:
+            self._geometry = geometry
+            full = True
+
+        widgets = self.widgets if full else [i for i in self.widgets if i in damaged]
+        area = 0
+        for i in widgets:
+            i.draw()
+            area += i.width * i.height
+
+        if full:
+            self.full_draws += 1
+            if self.widgets:
+                end = i.offset + i.length
+                if end < self.length:
+                    if self.horizontal:
+                        self.drawer.draw(offsetx=end, width=self.length - end)
+                    else:
+                        self.drawer.draw(offsety=end, height=self.length - end)
+        else:
+            self.partial_draws += 1
+
+        self.widget_draws += len(widgets)
+        self.area += area
+        now = time.monotonic()
+        self._areas.append((now, area))
+        while self._areas[0][0] < now - self.window:
+            self._areas.popleft()
+
+    def cmd_damage_info(self):
+        """
+        Get how many times the bar was drawn in full and in part, how many widgets and
+        how many pixels were drawn in total, and the pixels drawn per second recently.
+        """
+        now = time.monotonic()
+        recent = sum(area for t, area in self._areas if t >= now - self.window)
+        return {
+            'full_draws': self.full_draws,
+            'partial_draws': self.partial_draws,
+            'widget_draws': self.widget_draws,
+            'area': self.area,
+            'area_per_second': recent / self.window,
+        }
@@ -0,0 +1,183 @@
+"""
+One timer for all the polling bar widgets.
+
+Sources are functions that read something the bar shows, like /proc/meminfo or the
+battery status. On every tick, aligned to the wall clock so that the clock and the
+other widgets change together, the sampler reads each source that is due, keeps the
+result for the widgets, and refreshes the widgets whose sources changed. Bars whose
+widgets changed are then drawn once each, or only those widgets are drawn if the bar
+supports damage() (see config.bar.damage).
+
+Sources that block, like those that run a command, are read in Qtile's executor. A
+source can be read straight away with sample(), for instance right after a key binding
+has changed the volume, and sources that notify of changes themselves can push() their
+values instead of being read.
+"""
+import asyncio
+import time
+
+from libqtile import hook, qtile
+from libqtile.log_utils import logger
+
+
+class _Source:
+    __slots__ = ('read', 'interval', 'blocking', 'due', 'error')
+
+    def __init__(self, read, interval, blocking):
+        self.read = read
+        self.interval = interval
+        self.blocking = blocking
+        self.due = 0.0
+        self.error = None
+
+
+class Sampler:
+    def __init__(self, interval=1.0):
+        self.interval = interval
+        self._sources = {}
+        self._values = {}
+        self._widgets = []
+        # How many subscribed widgets show each source.
+        self._users = {}
+        self._handle = None
+        self.ticks = 0
+        self.reads = 0
+        self.draws = 0
+        hook.subscribe.shutdown(self.stop)
+
+    def stop(self):
+        """Stop the timer, until a widget subscribes again"""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    def source(self, name, read, interval=None, blocking=False):
+        """
+        Add a source, read every interval seconds (rounded up to whole ticks), unless
+        one with the same name has been added already. It is dropped again once no
+        subscribed widget shows it.
+        """
+        if name not in self._sources:
+            self._sources[name] = _Source(read, interval or self.interval, blocking)
+
+    def get(self, name, default=None):
+        return self._values.get(name, default)
+
+    def subscribe(self, widget):
+        """
+        Refresh a widget whenever one of the sources in its sources attribute changes.
+        The widget's refresh() updates it without drawing and returns True if the bar
+        needs to be drawn.
+        """
+        if widget not in self._widgets:
+            self._widgets.append(widget)
+            for name in widget.sources:
+                self._users[name] = self._users.get(name, 0) + 1
+        if self._handle is None:
+            self._schedule()
+        self.sample(*widget.sources)
+
+    def unsubscribe(self, widget):
+        if widget in self._widgets:
+            self._widgets.remove(widget)
+            for name in widget.sources:
+                self._users[name] -= 1
+                if not self._users[name]:
+                    del self._users[name]
+                    self._sources.pop(name, None)
+                    self._values.pop(name, None)
+        if not self._widgets:
+            self.stop()
+
+    def _schedule(self):
+        delay = self.interval - time.time() % self.interval
+        self._handle = qtile.call_later(delay, self._tick)
+
+    def _tick(self):
+        self._schedule()
+        self.ticks += 1
+        now = time.monotonic()
+        # Allow for timers firing slightly early so sources keep to their interval.
+        slack = self.interval / 2
+        due = []
+        for name, source in self._sources.items():
+            if source.due <= now + slack:
+                source.due = now + source.interval
+                due.append(name)
+        if due:
+            asyncio.ensure_future(self._sample(due))
+
+    def sample(self, *names):
+        """
+        Read the given sources now, rather than waiting for them to be due.
+        """
+        names = [name for name in names if name in self._sources]
+        if names:
+            asyncio.ensure_future(self._sample(names))
+
+    async def _read(self, name):
+        source = self._sources.get(name)
+        if source is None:
+            # Dropped since it was due.
+            return None
+        self.reads += 1
+        try:
+            if source.blocking:
+                value = await qtile.run_in_executor(source.read)
+            else:
+                value = source.read()
+        except Exception as e:
+            # Only log a failing source once rather than on every tick.
+            if repr(e) != source.error:
+                source.error = repr(e)
+                logger.exception(f'Sampler could not read {name}: {e}')
+            return self._values.get(name)
+        source.error = None
+        return value
+
+    def push(self, name, value):
+        """
+        Set the value of a source that is not polled, because whatever it reads tells
+        the sampler when it changes.
+        """
+        self._publish({name: value})
+
+    async def _sample(self, names):
+        values = await asyncio.gather(*(self._read(name) for name in names))
+        self._publish(dict(zip(names, values)))
+
+    def _publish(self, values):
+        changed = set()
+        for name, value in values.items():
+            if name not in self._users:
+                continue
+            if name not in self._values or self._values[name] != value:
+                self._values[name] = value
+                changed.add(name)
+        if not changed:
+            return
+
+        bars = {}
+        for widget in self._widgets:
+            if changed.intersection(widget.sources) and widget.configured:
+                if widget.refresh():
+                    bars.setdefault(widget.bar, []).append(widget)
+        for bar, widgets in bars.items():
+            self.draws += 1
+            if hasattr(bar, 'damage'):
+                bar.damage(*widgets)
+            else:
+                bar.draw()
+
+    def info(self):
+        return {
+            'interval': self.interval,
+            'sources': sorted(self._sources),
+            'widgets': len(self._widgets),
+            'ticks': self.ticks,
+            'reads': self.reads,
+            'draws': self.draws,
+        }
+
+
+sampler = Sampler()
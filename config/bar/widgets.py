@@ -0,0 +1,298 @@
+"""
+Versions of the polling bar widgets that are refreshed by the shared sampler rather than
+each keeping their own timer. They take the same options as Qtile's widgets.
+"""
+import time
+
+from libqtile.widget import backlight, base, battery, clock, volume
+
+from ..mappings import latency
+from .sampler import sampler
+
+
+class Sampled:
+    """
+    Mixin for widgets that are refreshed by the sampler. sources names the sampler
+    sources the widget shows, and add_sources() adds the ones it reads itself. They are
+    added when the widget is configured, so that a source dropped by the widget it
+    replaces is added back.
+    """
+    sources = ()
+
+    def add_sources(self):
+        pass
+
+    def timer_setup(self):
+        self.add_sources()
+        sampler.subscribe(self)
+
+    def finalize(self):
+        sampler.unsubscribe(self)
+        super().finalize()
+
+    def refresh(self):
+        text = self.poll()
+        if text == self.text:
+            return False
+        self.text = text
+        return True
+
+
+def _meminfo():
+    fields = {}
+    with open('/proc/meminfo') as f:
+        for line in f:
+            key, value = line.split(':', 1)
+            fields[key] = int(value.split()[0]) // 1024
+
+    total = fields['MemTotal']
+    cached = fields['Cached'] + fields.get('SReclaimable', 0)
+    available = fields.get('MemAvailable', fields['MemFree'])
+    swap_used = fields['SwapTotal'] - fields['SwapFree']
+    return {
+        'MemUsed': total - fields['MemFree'] - cached - fields['Buffers'],
+        'MemTotal': total,
+        'MemFree': fields['MemFree'],
+        'MemPercent': round(100 * (total - available) / total, 1),
+        'Buffers': fields['Buffers'],
+        'Active': fields['Active'],
+        'Inactive': fields['Inactive'],
+        'Shmem': fields['Shmem'],
+        'SwapTotal': fields['SwapTotal'],
+        'SwapFree': fields['SwapFree'],
+        'SwapUsed': swap_used,
+        'SwapPercent': round(100 * swap_used / fields['SwapTotal'], 1)
+        if fields['SwapTotal'] else 0.0,
+    }
+
+
+class Memory(Sampled, base.InLoopPollText):
+    """
+    Displays memory/swap usage, with the same fields as Qtile's Memory widget, read from
+    /proc/meminfo so that psutil is not needed.
+    """
+    orientations = base.ORIENTATION_HORIZONTAL
+    defaults = [
+        ("format", "{MemUsed}M/{MemTotal}M", "Formatting for field names."),
+        ("update_interval", 1.0, "Update interval for the Memory"),
+    ]
+    sources = ('memory',)
+
+    def __init__(self, **config):
+        base.InLoopPollText.__init__(self, "", **config)
+        self.add_defaults(Memory.defaults)
+
+    def add_sources(self):
+        sampler.source('memory', _meminfo, self.update_interval)
+
+    def poll(self):
+        values = sampler.get('memory')
+        if values is None:
+            return ''
+        return self.format.format(**values)
+
+
+class _SampledBattery:
+    """
+    Stands in for a battery widget's battery, returning the sampled status.
+    """
+
+    def update_status(self):
+        status = sampler.get('battery')
+        if status is None:
+            raise RuntimeError('Unable to read status for battery')
+        return status
+
+
+class Battery(Sampled, battery.Battery):
+    sources = ('battery',)
+
+    def __init__(self, **config):
+        battery.Battery.__init__(self, **config)
+        self._read = self._battery.update_status
+        self._battery = _SampledBattery()
+
+    def add_sources(self):
+        sampler.source('battery', self._read, self.update_interval)
+
+
+class BatteryIcon(Sampled, battery.BatteryIcon):
+    sources = ('battery',)
+
+    def __init__(self, **config):
+        battery.BatteryIcon.__init__(self, **config)
+        self._read = self._battery.update_status
+        self._battery = _SampledBattery()
+
+    def add_sources(self):
+        sampler.source('battery', self._read, self.update_interval)
+
+    def refresh(self):
+        try:
+            icon = self._get_icon_key(self._battery.update_status())
+        except RuntimeError:
+            return False
+        if icon == self.current_icon:
+            return False
+        self.current_icon = icon
+        return True
+
+
+class Backlight(Sampled, backlight.Backlight):
+    """
+    With a controller, such as config.apps.backlight.backlight, the widget shows the
+    controller's device, is updated as soon as the controller changes the brightness
+    and changes it through the controller. The brightness is still polled in case
+    something else changes it.
+    """
+    defaults = [
+        ('controller', None, 'Backlight controller used to change the brightness.'),
+    ]
+
+    def __init__(self, **config):
+        controller = config.get('controller')
+        if controller is not None and controller.name:
+            config.setdefault('backlight_name', controller.name)
+        backlight.Backlight.__init__(self, **config)
+        self.add_defaults(Backlight.defaults)
+        self.sources = ('backlight:' + self.backlight_name,)
+
+    def add_sources(self):
+        sampler.source(self.sources[0], self._read, self.update_interval)
+
+    def timer_setup(self):
+        Sampled.timer_setup(self)
+        if self.controller is not None:
+            self.controller.subscribe(self._pushed)
+
+    def _pushed(self, brightness, max_brightness):
+        sampler.push(self.sources[0], brightness / max_brightness)
+
+    def _read(self):
+        try:
+            return self._get_info()
+        except RuntimeError:
+            return None
+
+    def poll(self):
+        percent = sampler.get(self.sources[0])
+        if percent is None:
+            return 'Error: Unable to read backlight {}'.format(self.backlight_name)
+        return self.format.format(percent=percent)
+
+    def cmd_change_backlight(self, direction, step=None):
+        if self.controller is not None:
+            step = step or self.step
+            if direction is backlight.ChangeDirection.DOWN:
+                step = -step
+            self.controller.change(step)
+            return
+        backlight.Backlight.cmd_change_backlight(self, direction, step)
+        if self._future is not None:
+            self._future.add_done_callback(lambda _: sampler.sample(*self.sources))
+
+
+class Volume(Sampled, volume.Volume):
+    """
+    With a controller, such as config.apps.pulse.volume, the widget is updated whenever
+    the controller sees the volume change and its commands go through the controller.
+    Otherwise amixer is polled as usual.
+    """
+    defaults = [
+        ('controller', None, 'Volume controller to use instead of polling amixer.'),
+    ]
+    sources = ('volume',)
+
+    def __init__(self, **config):
+        volume.Volume.__init__(self, **config)
+        self.add_defaults(Volume.defaults)
+
+    def add_sources(self):
+        if self.controller is None:
+            sampler.source(
+                'volume', self.get_volume, self.update_interval, blocking=True
+            )
+
+    def timer_setup(self):
+        if self.theme_path:
+            self.setup_images()
+        Sampled.timer_setup(self)
+        if self.controller is not None:
+            self.controller.subscribe(self._pushed)
+
+    def _pushed(self, vol, muted):
+        sampler.push('volume', -1 if muted else vol)
+
+    def refresh(self):
+        vol = sampler.get('volume')
+        if vol is None or vol == self.volume:
+            return False
+        self.volume = vol
+        self._update_drawer()
+        return True
+
+    def cmd_increase_vol(self):
+        if self.controller is not None:
+            self.controller.change(self.step)
+            return
+        volume.Volume.cmd_increase_vol(self)
+        sampler.sample('volume')
+
+    def cmd_decrease_vol(self):
+        if self.controller is not None:
+            self.controller.change(-self.step)
+            return
+        volume.Volume.cmd_decrease_vol(self)
+        sampler.sample('volume')
+
+    def cmd_mute(self):
+        if self.controller is not None:
+            self.controller.toggle_mute()
+            return
+        volume.Volume.cmd_mute(self)
+        sampler.sample('volume')
+
+
+class Clock(Sampled, clock.Clock):
+    sources = ('time',)
+
+    def __init__(self, **config):
+        clock.Clock.__init__(self, **config)
+
+    def add_sources(self):
+        sampler.source('time', time.time, self.update_interval)
+
+
+class KeyLatency(Sampled, base.InLoopPollText):
+    """
+    Shows the key binding that is slowest at the 95th percentile, from
+    config.mappings.latency. Its stats command returns the full table.
+    """
+    orientations = base.ORIENTATION_HORIZONTAL
+    defaults = [
+        ('format', '{name} {p95_ms:.0f}ms', 'Format of the slowest binding.'),
+        ('update_interval', 1.0, 'Seconds between updates.'),
+    ]
+    sources = ('key_latency',)
+
+    def __init__(self, **config):
+        base.InLoopPollText.__init__(self, '', **config)
+        self.add_defaults(KeyLatency.defaults)
+
+    def add_sources(self):
+        sampler.source('key_latency', self._slowest, self.update_interval)
+
+    @staticmethod
+    def _slowest():
+        for name, row in latency.stats().items():
+            return dict(row, name=name.partition(':')[0])
+        return None
+
+    def poll(self):
+        row = sampler.get('key_latency')
+        if row is None:
+            return ''
+        return self.format.format(**row)
+
+    def cmd_stats(self):
+        return latency.stats()
@@ -1,6 +1,9 @@
 from libqtile import layout
 from libqtile.config import Match
 
+from .tile import MemoTile
+from .zoomy import ZoomyThumbs
+
 layouts = [
     layout.Columns(border_focus_stack=['#d75f5f', '#8f3d3d'], border_width=4),
     layout.Max(),
@@ -9,12 +12,13 @@ layouts = [
     # layout.Bsp(),
     # layout.Matrix(),
     layout.MonadTall(),
+    MemoTile(border_focus='#d75f5f', border_width=4),
     # layout.MonadWide(),
     # layout.RatioTile(),
     # layout.Tile(),
     # layout.TreeTab(),
     # layout.VerticalTile(),
-    layout.Zoomy(),
+    ZoomyThumbs(),
 ]
 
 floating_layout = layout.Floating(float_rules=[
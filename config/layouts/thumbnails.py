@@ -0,0 +1,394 @@
+"""
+Downscaled copies of windows, kept current by a worker thread.
+
+The worker has its own connection to the X server, so none of this goes through (or
+waits on) Qtile's connection. It asks the server to keep the contents of each window
+it has a thumbnail of off screen, even when covered (Composite, automatic redirection,
+as a compositor would) until the window is forgotten or the worker stops, is told when
+a watched window's contents change (Damage), and then has the server scale the window
+into a small pixmap (Render). A window that keeps changing, like a video, is rescaled
+at most once per interval.
+
+Sidebars are windows the thumbnails are drawn into. Redrawing one only copies the cached
+pixmaps, so it costs the same however many windows there are and however busy they are.
+"""
+import os
+import queue
+import select
+import threading
+import time
+
+import xcffib
+import xcffib.xproto
+from libqtile import hook
+from libqtile.log_utils import logger
+
+_FIXED_ONE = 1 << 16
+
+
+def _colour(colour):
+    """A '#rrggbb' colour as a Render colour, 16 bits per channel"""
+    colour = colour.lstrip('#')
+    red, green, blue = (int(colour[i:i + 2], 16) * 257 for i in (0, 2, 4))
+    return xcffib.render.COLOR.synthetic(red, green, blue, 0xffff)
+
+
+class _Thumbnail:
+    __slots__ = (
+        'wid', 'damage', 'format', 'width', 'height', 'source', 'source_picture',
+        'cell', 'pixmap', 'picture', 'size', 'dirty', 'rendered',
+    )
+
+    def __init__(self, wid, damage, format, width, height):
+        self.wid = wid
+        self.damage = damage
+        self.format = format
+        self.width = width
+        self.height = height
+        # The window's off screen pixmap, replaced whenever the window is resized.
+        self.source = None
+        self.source_picture = None
+        # The thumbnail, fitted in a cell of the sidebar.
+        self.cell = None
+        self.pixmap = None
+        self.picture = None
+        self.size = None
+        self.dirty = True
+        self.rendered = time.monotonic()
+
+
+class _Sidebar:
+    __slots__ = ('picture', 'width', 'height', 'cells', 'background', 'dirty')
+
+    def __init__(self, picture):
+        self.picture = picture
+        self.width = self.height = 0
+        self.cells = []
+        self.background = None
+        self.dirty = True
+
+
+class Thumbnails:
+    def __init__(self, interval=0.2):
+        self.interval = interval
+        self.renders = 0
+        self.redraws = 0
+        self.damage_events = 0
+        self._requests = queue.SimpleQueue()
+        self._wake = None
+        self._thread = None
+        self._failed = False
+        # Only used by the worker.
+        self._windows = {}
+        self._sidebars = {}
+        hook.subscribe.shutdown(self.stop)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._wake = os.pipe()
+        os.set_blocking(self._wake[0], False)
+        self._thread = threading.Thread(
+            target=self._run, name='thumbnails', daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None and not self._failed:
+            self._call('_stop')
+            # Give the worker a moment to unredirect its windows before Qtile exits.
+            self._thread.join(1)
+
+    def _call(self, method, *args):
+        if self._failed:
+            return
+        self.start()
+        self._requests.put((method, args))
+        os.write(self._wake[1], b'\0')
+
+    def show(self, sidebar, width, height, cells, background='#000000'):
+        """
+        Draw thumbnails into the window sidebar, of the given size. cells is a list of
+        (window, x, y, width, height), each window fitted into its rectangle and drawn
+        in order.
+        """
+        self._call('_show', sidebar, width, height, list(cells), background)
+
+    def hide(self, sidebar):
+        """Stop drawing into sidebar. The thumbnails are kept."""
+        self._call('_hide', sidebar)
+
+    def redraw(self, sidebar):
+        self._call('_redraw', sidebar)
+
+    def forget(self, window):
+        self._call('_forget', window)
+
+    def info(self):
+        return {
+            'windows': len(self._windows),
+            'sidebars': len(self._sidebars),
+            'damage_events': self.damage_events,
+            'renders': self.renders,
+            'redraws': self.redraws,
+        }
+
+    def _run(self):
+        try:
+            self._connect()
+        except Exception as e:
+            logger.warning(f'Window thumbnails are not available: {e!r}')
+            self._failed = True
+            return
+
+        fd = self.conn.get_file_descriptor()
+        try:
+            while self._handle_requests():
+                self._render()
+                self._handle_events()
+                self.conn.flush()
+                select.select([fd, self._wake[0]], [], [], self._timeout())
+        except Exception as e:
+            logger.exception(f'Stopped updating window thumbnails: {e}')
+            self._failed = True
+        finally:
+            try:
+                for wid in list(self._windows):
+                    self._forget(wid)
+                self.conn.flush()
+            except Exception:
+                # The server drops the redirections of a connection that is gone.
+                pass
+            self.conn.disconnect()
+
+    def _connect(self):
+        # Only imported once thumbnails are first shown. The extensions have to be
+        # imported before connecting for their events to be parsed.
+        import xcffib.composite
+        import xcffib.damage
+        import xcffib.render
+
+        self.conn = xcffib.connect()
+        self.composite = self.conn(xcffib.composite.key)
+        self.damage = self.conn(xcffib.damage.key)
+        self.render = self.conn(xcffib.render.key)
+        self.composite.QueryVersion(0, 4).reply()
+        self.damage.QueryVersion(1, 1).reply()
+        self.render.QueryVersion(0, 11).reply()
+
+        screen = self.conn.get_setup().roots[self.conn.pref_screen]
+        self.root = screen.root
+        self.depth = screen.root_depth
+        self.formats = {}
+        for pict_screen in self.render.QueryPictFormats().reply().screens:
+            for depth in pict_screen.depths:
+                for visual in depth.visuals:
+                    self.formats[visual.visual] = visual.format
+        self.root_format = self.formats[screen.root_visual]
+
+    def _handle_requests(self):
+        try:
+            os.read(self._wake[0], 4096)
+        except BlockingIOError:
+            pass
+        while True:
+            try:
+                method, args = self._requests.get_nowait()
+            except queue.Empty:
+                break
+            if method == '_stop':
+                return False
+            try:
+                getattr(self, method)(*args)
+            except xcffib.Error as e:
+                logger.debug(f'Thumbnail request {method} failed: {e!r}')
+        return True
+
+    def _handle_events(self):
+        while True:
+            try:
+                event = self.conn.poll_for_event()
+            except xcffib.Error as e:
+                # Most likely a window that was destroyed before it was forgotten.
+                logger.debug(f'Thumbnail request failed: {e!r}')
+                continue
+            if event is None:
+                return
+            if not isinstance(event, xcffib.damage.NotifyEvent):
+                continue
+            thumbnail = self._windows.get(event.drawable)
+            if thumbnail is None:
+                continue
+            self.damage_events += 1
+            thumbnail.dirty = True
+            size = (event.geometry.width, event.geometry.height)
+            if size != (thumbnail.width, thumbnail.height):
+                thumbnail.width, thumbnail.height = size
+                self._free_source(thumbnail)
+
+    def _timeout(self):
+        due = [
+            t.rendered + self.interval for t in self._windows.values()
+            if t.dirty and t.cell is not None
+        ]
+        if not due:
+            return None
+        return max(0.0, min(due) - time.monotonic())
+
+    def _show(self, sidebar, width, height, cells, background):
+        state = self._sidebars.get(sidebar)
+        if state is None:
+            picture = self.conn.generate_id()
+            self.render.CreatePicture(picture, sidebar, self.root_format, 0, [])
+            state = self._sidebars[sidebar] = _Sidebar(picture)
+        state.width, state.height = width, height
+        state.cells = cells
+        state.background = _colour(background)
+        state.dirty = True
+        for wid, _, _, cell_width, cell_height in cells:
+            thumbnail = self._windows.get(wid)
+            if thumbnail is None:
+                try:
+                    thumbnail = self._watch(wid)
+                except xcffib.Error as e:
+                    logger.debug(f'Could not watch {wid} for thumbnails: {e!r}')
+                    continue
+            if thumbnail.cell != (cell_width, cell_height):
+                thumbnail.cell = (cell_width, cell_height)
+                thumbnail.dirty = True
+
+    def _hide(self, sidebar):
+        state = self._sidebars.pop(sidebar, None)
+        if state is not None:
+            self.render.FreePicture(state.picture)
+
+    def _redraw(self, sidebar):
+        if sidebar in self._sidebars:
+            self._sidebars[sidebar].dirty = True
+
+    def _watch(self, wid):
+        geometry = self.conn.core.GetGeometry(wid)
+        attributes = self.conn.core.GetWindowAttributes(wid)
+        geometry, attributes = geometry.reply(), attributes.reply()
+        self.composite.RedirectWindow(wid, xcffib.composite.Redirect.Automatic)
+        damage = self.conn.generate_id()
+        self.damage.Create(damage, wid, xcffib.damage.ReportLevel.NonEmpty)
+        thumbnail = _Thumbnail(
+            wid, damage, self.formats[attributes.visual],
+            geometry.width, geometry.height,
+        )
+        self._windows[wid] = thumbnail
+        return thumbnail
+
+    def _forget(self, wid):
+        thumbnail = self._windows.pop(wid, None)
+        if thumbnail is None:
+            return
+        self.damage.Destroy(thumbnail.damage)
+        self.composite.UnredirectWindow(wid, xcffib.composite.Redirect.Automatic)
+        self._free_source(thumbnail)
+        self._free_thumbnail(thumbnail)
+        for state in self._sidebars.values():
+            if any(cell[0] == wid for cell in state.cells):
+                state.cells = [cell for cell in state.cells if cell[0] != wid]
+                state.dirty = True
+
+    def _free_source(self, thumbnail):
+        if thumbnail.source is not None:
+            self.render.FreePicture(thumbnail.source_picture)
+            self.conn.core.FreePixmap(thumbnail.source)
+            thumbnail.source = thumbnail.source_picture = None
+
+    def _free_thumbnail(self, thumbnail):
+        if thumbnail.pixmap is not None:
+            self.render.FreePicture(thumbnail.picture)
+            self.conn.core.FreePixmap(thumbnail.pixmap)
+            thumbnail.pixmap = thumbnail.picture = thumbnail.size = None
+
+    def _render(self):
+        now = time.monotonic()
+        rendered = set()
+        for thumbnail in self._windows.values():
+            if (
+                thumbnail.dirty and thumbnail.cell is not None
+                and now - thumbnail.rendered >= self.interval
+            ):
+                try:
+                    self._render_window(thumbnail)
+                except xcffib.Error as e:
+                    # Usually a window that is not mapped, it is tried again once it
+                    # is redrawn.
+                    logger.debug(
+                        f'Could not render the thumbnail of {thumbnail.wid}: {e!r}'
+                    )
+                    self._free_source(thumbnail)
+                else:
+                    rendered.add(thumbnail.wid)
+                thumbnail.dirty = False
+                thumbnail.rendered = now
+
+        for state in self._sidebars.values():
+            if state.dirty or any(cell[0] in rendered for cell in state.cells):
+                self._draw_sidebar(state)
+
+    def _render_window(self, thumbnail):
+        # Subtract first, so that changes made while rendering are reported again.
+        self.damage.Subtract(thumbnail.damage, 0, 0)
+        if thumbnail.source is None:
+            source = self.conn.generate_id()
+            self.composite.NameWindowPixmap(
+                thumbnail.wid, source, is_checked=True
+            ).check()
+            picture = self.conn.generate_id()
+            self.render.CreatePicture(picture, source, thumbnail.format, 0, [])
+            self.render.SetPictureFilter(picture, 8, 'bilinear', 0, [])
+            thumbnail.source, thumbnail.source_picture = source, picture
+
+        cell_width, cell_height = thumbnail.cell
+        scale = max(thumbnail.width / cell_width, thumbnail.height / cell_height, 1)
+        size = (
+            max(1, round(thumbnail.width / scale)),
+            max(1, round(thumbnail.height / scale)),
+        )
+        if size != thumbnail.size:
+            self._free_thumbnail(thumbnail)
+            thumbnail.pixmap = self.conn.generate_id()
+            self.conn.core.CreatePixmap(self.depth, thumbnail.pixmap, self.root, *size)
+            thumbnail.picture = self.conn.generate_id()
+            self.render.CreatePicture(
+                thumbnail.picture, thumbnail.pixmap, self.root_format, 0, []
+            )
+            thumbnail.size = size
+
+        # The transform maps points of the thumbnail to points of the window.
+        fixed = round(scale * _FIXED_ONE)
+        self.render.SetPictureTransform(
+            thumbnail.source_picture, (fixed, 0, 0, 0, fixed, 0, 0, 0, _FIXED_ONE)
+        )
+        self.render.Composite(
+            xcffib.render.PictOp.Src, thumbnail.source_picture, 0, thumbnail.picture,
+            0, 0, 0, 0, 0, 0, *size,
+        )
+        self.renders += 1
+
+    def _draw_sidebar(self, state):
+        self.render.FillRectangles(
+            xcffib.render.PictOp.Src, state.picture, state.background, 1,
+            [xcffib.xproto.RECTANGLE.synthetic(0, 0, state.width, state.height)],
+        )
+        for wid, x, y, cell_width, cell_height in state.cells:
+            thumbnail = self._windows.get(wid)
+            if thumbnail is None or thumbnail.size is None:
+                continue
+            width, height = thumbnail.size
+            self.render.Composite(
+                xcffib.render.PictOp.Src, thumbnail.picture, 0, state.picture,
+                0, 0, 0, 0,
+                x + (cell_width - width) // 2, y + (cell_height - height) // 2,
+                width, height,
+            )
+        state.dirty = False
+        self.redraws += 1
+
+
+thumbnails = Thumbnails()
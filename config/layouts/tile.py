@@ -0,0 +1,181 @@
+"""
+A master and stack tiling layout that only reconfigures windows that moved.
+
+Qtile's layouts place every window each time the group is laid out, which sends a
+configure request, a border repaint and a synthetic ConfigureNotify for every window,
+even when only the focus changed. MemoTile computes the rectangles for a given number of
+windows, screen area and ratio once and remembers them, then only places the windows
+whose rectangle or border width changed. Windows whose only change is the border colour
+just have their border repainted.
+
+The number of windows placed and skipped is included in the layout's info.
+"""
+import functools
+
+from libqtile.layout.base import _SimpleLayoutBase
+
+
+@functools.lru_cache(maxsize=256)
+def _tile(count, master_length, x, y, width, height, ratio, expand):
+    """
+    The outer rectangles of count windows: master_length windows stacked on the left
+    taking ratio of the width, and the rest stacked on the right.
+    """
+    masters = min(count, master_length)
+    stack = count - masters
+    master_width = int(width * ratio) if stack or not expand else width
+    rects = []
+    for i in range(masters):
+        h = height // masters
+        rects.append((x, y + i * h, master_width, h))
+    for i in range(stack):
+        h = height // stack
+        rects.append((x + master_width, y + i * h, width - master_width, h))
+    return tuple(rects)
+
+
+class MemoTile(_SimpleLayoutBase):
+    """
+    A master and stack layout that skips placing windows that have not moved.
+    """
+    defaults = [
+        ("border_focus", "#0000ff", "Border colour for the focused window."),
+        ("border_normal", "#000000", "Border colour for un-focused windows."),
+        ("border_width", 1, "Border width."),
+        ("margin", 0, "Margin of the layout (int or list of ints [N E S W])"),
+        ("ratio", 0.6, "Width-percentage of screen size reserved for master "
+                       "windows."),
+        ("ratio_increment", 0.05, "Amount to change ratio by when growing or "
+                                  "shrinking."),
+        ("master_length", 1, "Number of windows in the master stack."),
+        ("expand", True, "Expand the master windows to the full screen width if there "
+                         "are no other windows."),
+    ]
+
+    def __init__(self, **config):
+        _SimpleLayoutBase.__init__(self, **config)
+        self.add_defaults(MemoTile.defaults)
+        self._initial_ratio = self.ratio
+        self.placed = 0
+        self.repainted = 0
+        self.skipped = 0
+
+    def clone(self, group):
+        c = _SimpleLayoutBase.clone(self, group)
+        c.placed = c.repainted = c.skipped = 0
+        return c
+
+    def _rects(self, screen_rect):
+        return _tile(
+            len(self.clients), self.master_length, screen_rect.x, screen_rect.y,
+            screen_rect.width, screen_rect.height, round(self.ratio, 4), self.expand,
+        )
+
+    def _target(self, rect):
+        """
+        Where Window.place puts a window for an outer rectangle, after borders and
+        margins.
+        """
+        x, y, width, height = rect
+        bw = self.border_width
+        margin = self.margin
+        if isinstance(margin, int):
+            margin = [margin] * 4
+        return (
+            x + margin[3],
+            y + margin[0],
+            width - 2 * bw - margin[1] - margin[3],
+            height - 2 * bw - margin[0] - margin[2],
+        )
+
+    def _place(self, client, rect):
+        colour = self.border_focus if client.has_focus else self.border_normal
+        if (
+            not client.hidden
+            and client.borderwidth == self.border_width
+            and (client.x, client.y, client.width, client.height) == self._target(rect)
+        ):
+            if client.bordercolor == colour:
+                self.skipped += 1
+            else:
+                client.paint_borders(colour, self.border_width)
+                self.repainted += 1
+            return
+
+        x, y, width, height = rect
+        client.place(
+            x, y, width - 2 * self.border_width, height - 2 * self.border_width,
+            self.border_width, colour, margin=self.margin,
+        )
+        client.unhide()
+        self.placed += 1
+
+    def layout(self, windows, screen_rect):
+        rects = self._rects(screen_rect)
+        index = {client: i for i, client in enumerate(self.clients)}
+        for client in windows:
+            if client in index:
+                self._place(client, rects[index[client]])
+            else:
+                client.hide()
+
+    def configure(self, client, screen_rect):
+        if client in self.clients:
+            self._place(client, self._rects(screen_rect)[self.clients.index(client)])
+        else:
+            client.hide()
+
+    def info(self):
+        d = _SimpleLayoutBase.info(self)
+        d.update(
+            ratio=self.ratio,
+            master_length=self.master_length,
+            placed=self.placed,
+            repainted=self.repainted,
+            skipped=self.skipped,
+        )
+        return d
+
+    def _set_ratio(self, ratio):
+        self.ratio = min(0.95, max(0.05, ratio))
+        self.group.layout_all()
+
+    def cmd_grow(self):
+        self._set_ratio(self.ratio + self.ratio_increment)
+
+    def cmd_shrink(self):
+        self._set_ratio(self.ratio - self.ratio_increment)
+
+    def cmd_normalize(self):
+        self._set_ratio(self._initial_ratio)
+
+    cmd_grow_right = cmd_grow
+    cmd_grow_left = cmd_shrink
+
+    def cmd_increase_nmaster(self):
+        self.master_length += 1
+        self.group.layout_all()
+
+    def cmd_decrease_nmaster(self):
+        self.master_length = max(1, self.master_length - 1)
+        self.group.layout_all()
+
+    def cmd_up(self):
+        self.previous()
+
+    def cmd_down(self):
+        self.next()
+
+    cmd_left = cmd_up
+    cmd_right = cmd_down
+
+    def cmd_shuffle_up(self):
+        self.clients.shuffle_up()
+        self.group.layout_all()
+
+    def cmd_shuffle_down(self):
+        self.clients.shuffle_down()
+        self.group.layout_all()
+
+    cmd_shuffle_left = cmd_shuffle_up
+    cmd_shuffle_right = cmd_shuffle_down
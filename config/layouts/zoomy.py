@@ -0,0 +1,122 @@
+"""
+Zoomy with a sidebar drawn from cached thumbnails.
+
+Qtile's Zoomy layout shrinks every window but the focused one into the column on the
+right, so every focus change resizes all of the windows and has each application redraw
+itself at preview size. ZoomyThumbs keeps all of its windows at full size, stacked under
+the focused one, and draws the column itself from thumbnails that are only rescaled when
+a window's contents change (see thumbnails.py). Clicking a thumbnail focuses its window.
+"""
+from libqtile.layout.zoomy import Zoomy
+from libqtile.window import Internal
+
+from .thumbnails import thumbnails
+
+
+class ZoomyThumbs(Zoomy):
+    """
+    A layout with a single active window, and thumbnails of the others at the right.
+    """
+    defaults = [
+        ("name", "zoomythumbs", "Name of this layout."),
+        ("sidebar_background", "#000000", "Background colour of the right column."),
+    ]
+
+    def __init__(self, **config):
+        Zoomy.__init__(self, **config)
+        self.add_defaults(ZoomyThumbs.defaults)
+        self.sidebar = None
+        self._cells = []
+
+    def clone(self, group):
+        c = Zoomy.clone(self, group)
+        c.sidebar = None
+        c._cells = []
+        return c
+
+    def configure(self, client, screen_rect):
+        left, _ = screen_rect.hsplit(screen_rect.width - self.columnwidth)
+        client.place(
+            left.x, left.y, left.width, left.height, 0, None,
+            above=client is self.clients.current_client, margin=self.margin,
+        )
+        client.unhide()
+
+    def layout(self, windows, screen_rect):
+        Zoomy.layout(self, windows, screen_rect)
+        self._show_sidebar(screen_rect)
+
+    def _others(self):
+        """The windows in the column, in the order Zoomy puts them."""
+        if not self.clients:
+            return []
+        clients = list(self.clients)
+        focused = self.clients.current_index
+        return clients[focused + 1:] + clients[:focused]
+
+    def _show_sidebar(self, screen_rect):
+        left, right = screen_rect.hsplit(screen_rect.width - self.columnwidth)
+        if self.sidebar is None:
+            self.sidebar = Internal.create(
+                self.group.qtile, right.x, right.y, right.width, right.height
+            )
+            self.sidebar.handle_Expose = self._expose
+            self.sidebar.handle_ButtonPress = self._click
+            self.group.qtile.windows_map[self.sidebar.window.wid] = self.sidebar
+        elif (self.sidebar.x, self.sidebar.y, self.sidebar.width, self.sidebar.height) \
+                != (right.x, right.y, right.width, right.height):
+            self.sidebar.place(right.x, right.y, right.width, right.height, 0, None)
+        self.sidebar.unhide()
+
+        others = self._others()
+        height = right.width * left.height // left.width
+        if len(others) > 1 and height * len(others) > right.height:
+            step = (right.height - height) // (len(others) - 1)
+        else:
+            step = height
+        self._cells = [
+            (client, 0, step * i, right.width, height)
+            for i, client in enumerate(others)
+        ]
+        thumbnails.show(
+            self.sidebar.window.wid, right.width, right.height,
+            [(client.window.wid, *rect) for client, *rect in self._cells],
+            self.sidebar_background,
+        )
+
+    def _expose(self, event):
+        if event.count == 0:
+            thumbnails.redraw(self.sidebar.window.wid)
+
+    def _click(self, event):
+        # Later cells are drawn over earlier ones.
+        for client, x, y, width, height in reversed(self._cells):
+            if y <= event.event_y < y + height:
+                self.group.focus(client, False)
+                return
+
+    def hide(self):
+        if self.sidebar is not None:
+            thumbnails.hide(self.sidebar.window.wid)
+            self.sidebar.hide()
+
+    def remove(self, client):
+        thumbnails.forget(client.window.wid)
+        focus = Zoomy.remove(self, client)
+        if not self.clients:
+            # Layouts are not laid out without windows, so nothing would clear it.
+            self.hide()
+        return focus
+
+    def finalize(self):
+        if self.sidebar is not None:
+            thumbnails.hide(self.sidebar.window.wid)
+            del self.group.qtile.windows_map[self.sidebar.window.wid]
+            self.sidebar.kill()
+            self.sidebar = None
+        Zoomy.finalize(self)
+
+    def info(self):
+        d = Zoomy.info(self)
+        d.update(thumbnails=thumbnails.info())
+        return d
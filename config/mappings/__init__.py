@@ -4,5 +4,6 @@ from .volume import volume_keys
 from .print import print_keys
 from .groups import group_keys
 from .mouse import mouse
+from .latency import instrument
 
-keys =  main_keys + backlight_keys + volume_keys + print_keys + group_keys
+keys =  instrument(main_keys + backlight_keys + volume_keys + print_keys + group_keys)
@@ -1,7 +1,8 @@
-from libqtile.lazy import lazy
 from libqtile.config import Key
 
+from ..apps.backlight import backlight
+
 backlight_keys = [
-        Key([], "XF86MonBrightnessUp", lazy.spawn("brightnessctl set +5%")),
-        Key([], "XF86MonBrightnessDown", lazy.spawn("brightnessctl set 5%-"))
+        Key([], "XF86MonBrightnessUp", backlight.lazy_up),
+        Key([], "XF86MonBrightnessDown", backlight.lazy_down)
         ]
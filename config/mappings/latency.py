@@ -0,0 +1,135 @@
+"""
+Opt-in timing of key bindings.
+
+Set QTILE_KEY_LATENCY=1 in the environment before starting Qtile, and every binding's
+commands are wrapped so that the time from Qtile receiving the key press until the
+binding's last command returns is recorded. Commands that start work in the background,
+like spawning a program, are timed until they return, not until the work is done.
+
+Each binding has a histogram of a fixed number of buckets, each twice as wide as the
+one before, from under 125 microseconds up. stats() summarises them, and is also
+available as the stats command of the KeyLatency bar widget.
+"""
+import os
+import time
+from array import array
+
+from libqtile import hook, qtile
+from libqtile.command import interface
+from libqtile.lazy import lazy
+from libqtile.log_utils import logger
+
+# Bucket i counts durations under 125 * 2 ** i microseconds, the last one the rest.
+BUCKETS = 20
+_UNIT = 125e-6
+
+histograms = {}
+_pressed = None
+
+
+def enabled():
+    return bool(os.environ.get('QTILE_KEY_LATENCY'))
+
+
+class Histogram:
+    __slots__ = ('counts', 'count', 'total', 'max', 'last')
+
+    def __init__(self):
+        self.counts = array('L', [0]) * BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.last = 0.0
+
+    def add(self, seconds):
+        self.counts[min(BUCKETS - 1, int(seconds / _UNIT).bit_length())] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.last = seconds
+
+    def percentile(self, p):
+        """
+        The upper bound of the bucket holding the pth percentile, in seconds.
+        """
+        rank = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank and n:
+                return min(_UNIT * 2 ** i, self.max)
+        return self.max
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean_ms': 1000 * self.total / self.count if self.count else 0.0,
+            'p50_ms': 1000 * self.percentile(50),
+            'p95_ms': 1000 * self.percentile(95),
+            'max_ms': 1000 * self.max,
+            'last_ms': 1000 * self.last,
+        }
+
+
+def stats():
+    """
+    A summary of each binding that has been used, slowest first by 95th percentile.
+    """
+    rows = {
+        name: histogram.summary() for name, histogram in histograms.items()
+        if histogram.count
+    }
+    return dict(sorted(rows.items(), key=lambda r: r[1]['p95_ms'], reverse=True))
+
+
+def _describe(key, command):
+    keys = '-'.join(list(key.modifiers) + [key.key])
+    return f'{keys}: {key.desc or command.name}'
+
+
+def _timed(qtile, name, command, last):
+    if not command.check(qtile):
+        return
+    status, value = qtile.server.call(
+        (command.selectors, command.name, command.args, command.kwargs)
+    )
+    if status in (interface.ERROR, interface.EXCEPTION):
+        logger.error("KB command error %s: %s" % (command.name, value))
+    if last and _pressed is not None:
+        histograms[name].add(time.perf_counter() - _pressed)
+
+
+@hook.subscribe.startup_complete
+def _watch_key_events():
+    if not enabled():
+        return
+    process_key_event = qtile.process_key_event
+
+    def timed_process_key_event(keysym, mask):
+        global _pressed
+        _pressed = time.perf_counter()
+        process_key_event(keysym, mask)
+
+    qtile.process_key_event = timed_process_key_event
+
+
+def instrument(keys):
+    """
+    Wrap the commands of the given keys, and of the keys in any chords among them, so
+    that they are timed. Nothing is changed unless QTILE_KEY_LATENCY is set.
+    """
+    if not enabled():
+        return keys
+    for key in keys:
+        # KeyChord spells it submapings in this version of Qtile.
+        submappings = getattr(key, 'submapings', getattr(key, 'submappings', None))
+        if submappings is not None:
+            instrument(submappings)
+            continue
+        name = _describe(key, key.commands[-1])
+        histograms.setdefault(name, Histogram())
+        key.commands = [
+            lazy.function(_timed, name, command, i == len(key.commands) - 1)
+            for i, command in enumerate(key.commands)
+        ]
+    return keys
@@ -2,6 +2,8 @@ from libqtile.lazy import lazy
 from libqtile.config import Key
 from libqtile.utils import guess_terminal
 
+from ..reload import reload_config
+
 mod = "mod4"
 terminal = guess_terminal(preference='st')
 
@@ -56,7 +58,9 @@ main_keys = [
     Key([mod], "q", lazy.screen.toggle_group(), desc="Toggle between groups"),
     Key([mod, "shift"], "c", lazy.window.kill(), desc="Kill focused window"),
 
-    Key([mod, "shift"], "r", lazy.restart(), desc="Restart Qtile"),
+    Key([mod, "shift"], "r", lazy.function(reload_config),
+        desc="Reload the parts of the config that changed"),
+    Key([mod, "control"], "r", lazy.restart(), desc="Restart Qtile"),
     Key([mod, "shift"], "x", lazy.shutdown(), desc="Shutdown Qtile"),
 
     # Command runner
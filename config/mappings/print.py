@@ -1,5 +1,5 @@
 from libqtile.config import Key
-from ..apps import screenshots
+from ..apps import burst, screenshots
 
 from . import mod
 print_keys = [
@@ -7,4 +7,6 @@ print_keys = [
         Key(["control"],      'Print', screenshots(selection=False, clipboard=True )),
         Key([mod],            'Print', screenshots(selection=True,  clipboard=False)),
         Key([mod, "control"], 'Print', screenshots(clipboard=True,  selection=True  )),
+        Key(["shift"],        'Print', burst()),
+        Key([mod, "shift"],   'Print', burst(selection=True)),
         ]
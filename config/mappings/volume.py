@@ -1,8 +1,9 @@
-from libqtile.lazy import lazy
 from libqtile.config import Key
 
+from ..apps.pulse import volume
+
 volume_keys = [
-        Key([], "XF86AudioRaiseVolume", lazy.spawn('pactl set-sink-volume @DEFAULT_SINK@ +5%')),
-        Key([], "XF86AudioLowerVolume", lazy.spawn('pactl set-sink-volume @DEFAULT_SINK@ -5%')),
-        Key([], "XF86AudioMute", lazy.spawn('pactl set-sink-mute @DEFAULT_SINK@ toggle'))
+        Key([], "XF86AudioRaiseVolume", volume.lazy_up),
+        Key([], "XF86AudioLowerVolume", volume.lazy_down),
+        Key([], "XF86AudioMute", volume.lazy_mute)
         ]
@@ -0,0 +1,93 @@
+"""
+Import-time profiler for the config.
+
+Set QTILE_PROFILE_IMPORTS=1 in the environment before starting Qtile, and the config
+package records how long every module imported while loading it took. The report is
+written to import_profile.txt in Qtile's cache directory, listing each module's own time
+(excluding the modules it imported) and its total time, slowest first.
+"""
+import importlib.abc
+import os
+import sys
+import time
+
+_records = {}
+_stack = []
+_finder = None
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader):
+        self.loader = loader
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        name = module.__name__
+        _stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            total = time.perf_counter() - start
+            nested = _stack.pop()
+            if _stack:
+                _stack[-1] += total
+            _records[name] = (total - nested, total)
+
+
+class _TimedFinder(importlib.abc.MetaPathFinder):
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader)
+                return spec
+        return None
+
+
+def enabled():
+    return bool(os.environ.get('QTILE_PROFILE_IMPORTS'))
+
+
+def start():
+    """Start timing imports of modules that have not been imported yet"""
+    global _finder
+    if _finder is None:
+        _finder = _TimedFinder()
+        sys.meta_path.insert(0, _finder)
+
+
+def stop():
+    global _finder
+    if _finder is not None:
+        sys.meta_path.remove(_finder)
+        _finder = None
+
+
+def report(limit=None):
+    """The recorded imports as text, slowest first by their own time"""
+    rows = sorted(_records.items(), key=lambda r: r[1][0], reverse=True)[:limit]
+    own_total = sum(own for own, _ in _records.values())
+    lines = [f'{"own ms":>9} {"total ms":>9}  module']
+    lines.extend(
+        f'{own * 1000:9.2f} {total * 1000:9.2f}  {name}' for name, (own, total) in rows
+    )
+    lines.append(f'{own_total * 1000:9.2f} {"":>9}  {len(_records)} modules')
+    return '\n'.join(lines)
+
+
+def save(path=None):
+    if path is None:
+        from libqtile.utils import get_cache_dir
+        path = os.path.join(get_cache_dir(), 'import_profile.txt')
+    with open(path, 'w') as f:
+        f.write(report() + '\n')
+    return path
@@ -3,15 +3,11 @@ Simple base classes that can be used for multiple plugins.
 """
 
 
+import functools
+import importlib
 import os
 from random import randint
 
-import gi
-gi.require_version('Gst', '1.0')
-from gi.repository import Gst
-gi.require_version('Notify', '0.7')
-from gi.repository import Notify
-
 from xcffib.xproto import StackMode
 from libqtile.drawer import Drawer
 from libqtile.lazy import lazy
@@ -19,12 +15,29 @@ from libqtile.log_utils import logger
 from libqtile import configurable, pangocffi, window
 
 
+@functools.lru_cache(maxsize=None)
+def gi_module(name, version):
+    """
+    Import and initialise a GObject introspection module the first time it is needed.
+    Loading the typelibs and initialising GStreamer is slow, so doing it here rather than
+    on import keeps it out of the import of qtools for configs that never use them. The
+    config package itself does not import qtools.
+    """
+    import gi
+    gi.require_version(name, version)
+    module = importlib.import_module('gi.repository.' + name)
+    if name == 'Gst':
+        module.init(None)
+    elif name == 'Notify':
+        module.init('Qtile')
+    return module
+
+
 class Notifier(configurable.Configurable):
     """
     This is a base class for classes with methods that are to be executed upon key
     presses and that generate pop-up notifications.
     """
-    _is_initted = False
 
     defaults = [
         ('summary', 'Notifier', 'Notification summary.'),
@@ -33,12 +46,9 @@ class Notifier(configurable.Configurable):
     ]
 
     def __init__(self, **config):
-        if not Notifier._is_initted:
-            Notifier._is_initted = True
-            Notify.init('Qtile')
-
         configurable.Configurable.__init__(self, **config)
         self.add_defaults(Notifier.defaults)
+        Notify = gi_module('Notify', '0.7')
         self.notifier = Notify.Notification.new(
             config.get('summary', 'Notifier'), ''
         )
@@ -80,13 +90,12 @@ class Notifier(configurable.Configurable):
         self.notifier.hide()
 
 
-Gst.init(None)
-
 def play_sound(path):
     """
     Play an audio file. This accepts a full path to an audio file. This is mostly a
     snippet from the playsound library.
     """
+    Gst = gi_module('Gst', '1.0')
     playbin = Gst.ElementFactory.make('playbin', 'playbin')
     playbin.props.uri = 'file://' + path
 
@@ -1,2 +1,3 @@
-from .borders import enable
-__all__ = ('enable',)
+from .borders import cache_info, enable, repaint_info
+from .spec import Style
+__all__ = ('Style', 'cache_info', 'enable', 'repaint_info')
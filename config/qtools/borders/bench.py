@@ -0,0 +1,206 @@
+"""
+Benchmark for border styles that needs no X server.
+
+Each style is run against a fake connection that records the X requests it would send,
+and how many bytes they would take on the wire. Both the cold path, where a border has
+to be drawn, and the warm path, where it is found in the pixmap cache, are measured.
+
+Example usage:
+
+    python -m qtools.borders.bench
+    python -m qtools.borders.bench --repeat 500 --json > before.json
+
+"""
+
+
+import argparse
+import itertools
+import json
+import time
+
+from . import cache, palette
+from .borders import _style_map
+from .spec import compile_style
+
+
+SIZES = ((320, 240), (1280, 720), (1920, 1080), (3840, 2160))
+BORDERWIDTHS = (2, 4, 8)
+COLORS = {
+    'frame': ('#d75f5f', '#8f3d3d'),
+    'cde': ('#4f4f4f', '#8f8f8f', '#cfcfcf'),
+}
+
+# Fixed request sizes, and sizes per list item, in bytes.
+_REQUEST_SIZES = {
+    'ChangeGC': (12, 4),
+    'ChangeWindowAttributes': (12, 4),
+    'CopyArea': (28, 0),
+    'CreateGC': (16, 4),
+    'CreatePixmap': (16, 0),
+    'FillPoly': (16, 4),
+    'FreeGC': (8, 0),
+    'FreePixmap': (8, 0),
+    'PolyFillRectangle': (12, 8),
+    'PolyLine': (12, 4),
+}
+
+
+class FakeCore:
+    """
+    Stands in for xcffib's core protocol object, counting requests instead of sending
+    them.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes = 0
+        self.counts = {}
+
+    def reset(self):
+        self.requests = 0
+        self.bytes = 0
+        self.counts.clear()
+
+    def __getattr__(self, name):
+        fixed, per_item = _REQUEST_SIZES.get(name, (4, 0))
+
+        def request(*args):
+            size = fixed
+            if per_item and isinstance(args[-1], (list, tuple)):
+                size += per_item * len(args[-1])
+            self.requests += 1
+            self.bytes += size
+            self.counts[name] = self.counts.get(name, 0) + 1
+
+        return request
+
+
+class FakeConnection:
+    """
+    Stands in for both an xcffib connection and Qtile's xcbq.Connection wrapper.
+    """
+
+    def __init__(self):
+        self.core = FakeCore()
+        self.conn = self
+        self._ids = itertools.count(0x200000)
+        self.default_screen = _FakeScreen(self)
+
+    def generate_id(self):
+        return next(self._ids)
+
+    def color_pixel(self, name):
+        return int(name.lstrip('#'), 16) | 0xff << 24
+
+
+class _FakeScreen:
+    root_depth = 24
+
+    def __init__(self, conn):
+        self.root = FakeWindow(conn, 0x100)
+
+
+class FakeWindow:
+    def __init__(self, conn, wid):
+        self.conn = conn
+        self.wid = wid
+
+    def set_attribute(self, **kwargs):
+        self.conn.core.ChangeWindowAttributes(self.wid, 0, list(kwargs.values()))
+
+
+def _measure(style, window, colors, borderwidth, width, height, repeat, cold):
+    core = window.conn.core
+    elapsed = 0.0
+    requests = 0
+    nbytes = 0
+
+    for _ in range(repeat):
+        if cold:
+            cache.pixmaps.clear()
+        core.reset()
+        start = time.perf_counter()
+        style(window, list(colors), borderwidth, width, height)
+        elapsed += time.perf_counter() - start
+        requests += core.requests
+        nbytes += core.bytes
+
+    return {
+        'requests': requests / repeat,
+        'bytes': nbytes / repeat,
+        'usec': elapsed / repeat * 1e6,
+    }
+
+
+def run(styles=None, sizes=SIZES, borderwidths=BORDERWIDTHS, repeat=100):
+    """
+    Benchmark the given styles, or all of them, returning a list of results.
+    """
+    results = []
+    conn = FakeConnection()
+    window = FakeWindow(conn, 0x400)
+    budget = cache.pixmaps.budget
+    cache.pixmaps.budget = 2 ** 40
+
+    try:
+        for name in styles or sorted(_style_map):
+            style = compile_style(_style_map[name])
+            colors = COLORS[name]
+            for (width, height), borderwidth in itertools.product(sizes, borderwidths):
+                # Colour and GC lookups are made once per session, so warm them first.
+                cache.pixmaps.clear()
+                style(window, list(colors), borderwidth, width, height)
+                args = (style, window, colors, borderwidth, width, height, repeat)
+                results.append({
+                    'style': name,
+                    'width': width,
+                    'height': height,
+                    'borderwidth': borderwidth,
+                    'cold': _measure(*args, cold=True),
+                    'warm': _measure(*args, cold=False),
+                })
+    finally:
+        cache.pixmaps.clear()
+        cache.pixmaps.budget = budget
+        palette.clear(conn)
+
+    return results
+
+
+def _format(results):
+    header = '{:<6} {:>11} {:>3}  {:>5} {:>7} {:>9}  {:>5} {:>7} {:>9}'.format(
+        'style', 'size', 'bw', 'reqs', 'bytes', 'usec', 'reqs', 'bytes', 'usec'
+    )
+    lines = ['{:<24}{:^23}  {:^23}'.format('', 'cold', 'warm'), header]
+    for r in results:
+        lines.append(
+            '{:<6} {:>11} {:>3}  {:>5.0f} {:>7.0f} {:>9.1f}  {:>5.0f} {:>7.0f} {:>9.1f}'
+            .format(
+                r['style'], '{}x{}'.format(r['width'], r['height']), r['borderwidth'],
+                r['cold']['requests'], r['cold']['bytes'], r['cold']['usec'],
+                r['warm']['requests'], r['warm']['bytes'], r['warm']['usec'],
+            )
+        )
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('styles', nargs='*', help='Styles to benchmark. Defaults to all.')
+    parser.add_argument('-n', '--repeat', type=int, default=100,
+                        help='Repaints to average over for each case.')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON.')
+    args = parser.parse_args()
+    for style in args.styles:
+        if style not in _style_map:
+            parser.error('unknown style: {}'.format(style))
+
+    results = run(args.styles, repeat=args.repeat)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(_format(results))
+
+
+if __name__ == '__main__':
+    main()
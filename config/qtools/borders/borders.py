@@ -7,14 +7,30 @@ Example usage:
 
     borders.enable('frame')
 
+New styles can be described as data using qtools.borders.spec and passed to enable in
+place of a name.
+
+Rendered borders are cached on the X server, so windows that share a size and colours
+reuse the same pixmap. The cache is bounded by a memory budget in bytes, which can be
+set when enabling a style.
+
+Each window's last painted colours and geometry are also remembered, so that repeated
+requests to paint an unchanged border, which are common during layout changes, are
+skipped without talking to the X server at all.
+
 """
 
 
+import functools
+
+from libqtile import hook
 from libqtile.log_utils import logger
 from libqtile.backend.x11 import xcbq
 
+from . import cache
 from .cde import cde
 from .frame import frame
+from .spec import Style, compile_style
 
 
 _style_map = {
@@ -22,8 +38,35 @@ _style_map = {
     'cde': cde,
 }
 
+_painted = {}
+_counts = {'painted': 0, 'skipped': 0}
+
+
+def _tracked(style):
+    """
+    Wrap a style so that it only runs when a window's border has actually changed.
+    """
+    @functools.wraps(style)
+    def paint_borders(self, colors, borderwidth, width, height):
+        if isinstance(colors, list):
+            state = (tuple(colors), borderwidth, width, height)
+        else:
+            state = (colors, borderwidth, width, height)
+        if _painted.get(self.wid) == state:
+            _counts['skipped'] += 1
+            return
+        style(self, colors, borderwidth, width, height)
+        _painted[self.wid] = state
+        _counts['painted'] += 1
+    return paint_borders
+
+
+@hook.subscribe.client_killed
+def _forget(client):
+    _painted.pop(client.window.wid, None)
+
 
-def enable(style):
+def enable(style, cache_budget=None):
     """
     Enable a particular style of window borders.
 
@@ -34,12 +77,36 @@ def enable(style):
 
     Parameters
     ----------
-    style : str
-        A string specifying which style to use.
+    style : str or Style
+        A string specifying which style to use, or a Style instance.
 
+    cache_budget : int (optional)
+        Maximum number of bytes of prerendered border pixmaps to keep on the X server.
+
+    """
+    if cache_budget is not None:
+        cache.pixmaps.budget = cache_budget
+
+    if not isinstance(style, Style):
+        name = style.lower()
+        if name not in _style_map:
+            logger.exception("qtools.borders: style {} not found.".format(name))
+            return
+        style = _style_map[name]
+
+    _painted.clear()
+    xcbq.Window.paint_borders = _tracked(compile_style(style))
+
+
+def cache_info():
+    """
+    Get statistics for the border pixmap cache.
+    """
+    return cache.pixmaps.info()
+
+
+def repaint_info():
+    """
+    Get the number of border repaints that were performed and skipped.
     """
-    style = style.lower()
-    if style in _style_map:
-        xcbq.Window.paint_borders = _style_map[style]
-    else:
-        logger.exception("qtools.borders: style {} not found.".format(style))
+    return dict(_counts, windows=len(_painted))
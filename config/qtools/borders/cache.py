@@ -0,0 +1,139 @@
+"""
+A cache of prerendered border pixmaps.
+
+Styles describe how to draw a border with a draw callback. The first time a
+particular (style, width, height, borderwidth, colours) combination is painted, the
+callback is run and the result is kept on the X server, so that painting a window of
+the same size and colours again only needs a single ChangeWindowAttributes request.
+"""
+
+
+from collections import OrderedDict
+
+import xcffib
+import xcffib.xproto
+from libqtile.log_utils import logger
+
+from . import palette
+
+
+class PixmapCache:
+    """
+    An LRU cache of server-side pixmaps with a memory budget in bytes. Pixmaps that
+    are evicted are freed; any window still using one as its border keeps its
+    contents as the X server holds its own reference.
+    """
+
+    def __init__(self, budget=64 * 1024 * 1024):
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, core, key, pixmap, nbytes):
+        """
+        Store a pixmap. Returns False if it is too large to be cached at all, in
+        which case the caller remains responsible for freeing it.
+        """
+        if nbytes > self.budget:
+            return False
+        if key in self._entries:
+            self._free(key)
+        while self._entries and self.size + nbytes > self.budget:
+            self._free(next(iter(self._entries)))
+            self.evictions += 1
+        self._entries[key] = (pixmap, nbytes, core)
+        self.size += nbytes
+        return True
+
+    def _free(self, key):
+        pixmap, nbytes, core = self._entries.pop(key)
+        self.size -= nbytes
+        try:
+            core.FreePixmap(pixmap)
+        except xcffib.ConnectionException:
+            pass
+
+    def clear(self):
+        while self._entries:
+            self._free(next(iter(self._entries)))
+
+    def info(self):
+        return {
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'budget': self.budget,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+
+pixmaps = PixmapCache()
+
+
+def paint(window, key, borderwidth, width, height, draw):
+    """
+    Set a window's border pixmap, rendering it with draw(core, pixmap, outer_w,
+    outer_h) only if it is not already in the cache. The callback draws the whole
+    window area as if the window were at the origin, using GCs from palette.
+    """
+    core = window.conn.conn.core
+    border = pixmaps.get(key)
+    cached = border is not None
+
+    if not cached:
+        outer_w = width + borderwidth * 2
+        outer_h = height + borderwidth * 2
+        border = _render(window, draw, borderwidth, outer_w, outer_h)
+        nbytes = outer_w * outer_h * 4
+        cached = pixmaps.put(core, key, border, nbytes)
+        if not cached:
+            logger.debug("qtools.borders: {}x{} pixmap exceeds cache budget."
+                         .format(outer_w, outer_h))
+
+    core.ChangeWindowAttributes(window.wid, xcffib.xproto.CW.BorderPixmap, [border])
+    if not cached:
+        core.FreePixmap(border)
+
+
+def _render(window, draw, borderwidth, outer_w, outer_h):
+    """
+    Draw a border into a scratch pixmap and then copy it, shifted so that its origin
+    lies at the inside corner of the border, into the pixmap that is returned. This is
+    the same transformation that xcbq.Window.set_borderpixmap applies.
+    """
+    conn = window.conn.conn
+    core = conn.core
+    depth = window.conn.default_screen.root_depth
+    gc = palette.gc(window.conn, 0)
+    pixmap = conn.generate_id()
+    border = conn.generate_id()
+
+    try:
+        core.CreatePixmap(depth, pixmap, window.wid, outer_w, outer_h)
+        draw(core, pixmap, outer_w, outer_h)
+
+        core.CreatePixmap(depth, border, window.wid, outer_w, outer_h)
+        most_w = outer_w - borderwidth
+        most_h = outer_h - borderwidth
+        core.CopyArea(pixmap, border, gc, borderwidth, borderwidth, 0, 0, most_w, most_h)
+        core.CopyArea(pixmap, border, gc, 0, 0, most_w, most_h, borderwidth, borderwidth)
+        core.CopyArea(pixmap, border, gc, borderwidth, 0, 0, most_h, most_w, borderwidth)
+        core.CopyArea(pixmap, border, gc, 0, borderwidth, most_w, 0, borderwidth, most_h)
+
+    finally:
+        core.FreePixmap(pixmap)
+
+    return border
@@ -0,0 +1,55 @@
+"""
+Shared colour and graphics context lookups for border styles.
+
+Converting a colour to a pixel value can mean waiting on an AllocColor reply from the X
+server, so each colour is only converted once. Each pixel value also gets its own GC,
+created against the root window so that it can draw onto any pixmap of the root depth,
+which means drawing a border never needs to change a GC's foreground.
+"""
+
+
+import xcffib
+import xcffib.xproto
+
+
+_pixels = {}
+_gcs = {}
+
+
+def pixel(conn, color):
+    """
+    Get the pixel value for a colour using an xcbq.Connection.
+    """
+    try:
+        return _pixels[color]
+    except KeyError:
+        value = _pixels[color] = conn.color_pixel(color)
+        return value
+
+
+def gc(conn, value):
+    """
+    Get a GC with the given pixel value as its foreground. Graphics exposures are
+    disabled, so these can also be used for copying between pixmaps.
+    """
+    try:
+        return _gcs[value]
+    except KeyError:
+        gcid = _gcs[value] = conn.conn.generate_id()
+        conn.conn.core.CreateGC(
+            gcid,
+            conn.default_screen.root.wid,
+            xcffib.xproto.GC.Foreground | xcffib.xproto.GC.GraphicsExposures,
+            [value, 0],
+        )
+        return gcid
+
+
+def clear(conn):
+    """
+    Free all GCs and forget all known colours.
+    """
+    for gcid in _gcs.values():
+        conn.conn.core.FreeGC(gcid)
+    _gcs.clear()
+    _pixels.clear()
@@ -0,0 +1,304 @@
+"""
+Declarative border styles.
+
+A style is a list of layers that are painted in order over the whole window area. Each
+layer is drawn in a colour given by its role, and the roles of a style are matched
+positionally to the colours that Qtile passes for the border. Positions are linear
+expressions of the outer window size and the border width, built with start() and
+end():
+
+    start(3)          3 pixels from the left or top edge
+    start(0, bw=1)    one border width from the left or top edge
+    end(-2, bw=-1)    two pixels and one border width before the right or bottom edge
+
+Example:
+
+    from qtools.borders import enable
+    from qtools.borders.spec import Band, Bevel, Style
+
+    ridge = Style(
+        'ridge', ('shadow', 'normal', 'light'),
+        [
+            Band('normal'),
+            Bevel('light', 'shadow'),
+            Bevel('shadow', 'light', bw=1, px=-1),
+        ],
+    )
+    enable(ridge)
+
+compile_style() turns a style into a paint_borders method. Geometry for each layer is
+memoized per (border width, outer size), adjacent rectangle fills that share a colour
+are merged into one request, and every style is rendered through the pixmap cache.
+"""
+
+
+import abc
+import functools
+
+import xcffib
+import xcffib.xproto
+
+from . import cache, palette
+
+
+class _Expr:
+    __slots__ = ('edge', 'px', 'bw')
+
+    def __init__(self, edge, px, bw):
+        self.edge = edge
+        self.px = px
+        self.bw = bw
+
+    def __call__(self, outer, borderwidth):
+        return self.edge * outer + self.bw * borderwidth + self.px
+
+
+def start(px=0, bw=0):
+    """
+    A position measured from the left or top of the outer window.
+    """
+    return _Expr(0, px, bw)
+
+
+def end(px=0, bw=0):
+    """
+    A position measured from the right or bottom of the outer window. This is also
+    used for sizes that scale with the window.
+    """
+    return _Expr(1, px, bw)
+
+
+def _expr(value):
+    if isinstance(value, _Expr):
+        return value
+    return start(value)
+
+
+class _Layer(abc.ABC):
+    request = None
+
+    def __init__(self, role):
+        self.role = role
+
+    @abc.abstractmethod
+    def geometry(self, borderwidth, outer_w, outer_h):
+        """The rectangles or points of the layer for a border width and outer size"""
+
+
+class Rect(_Layer):
+    """
+    A filled rectangle.
+    """
+    request = 'PolyFillRectangle'
+
+    def __init__(self, role, x, y, width, height):
+        _Layer.__init__(self, role)
+        self.x = _expr(x)
+        self.y = _expr(y)
+        self.width = _expr(width)
+        self.height = _expr(height)
+
+    def geometry(self, borderwidth, outer_w, outer_h):
+        return [xcffib.xproto.RECTANGLE.synthetic(
+            self.x(outer_w, borderwidth),
+            self.y(outer_h, borderwidth),
+            self.width(outer_w, borderwidth),
+            self.height(outer_h, borderwidth),
+        )]
+
+
+class Band(Rect):
+    """
+    A filled rectangle inset equally from every edge of the outer window. With no
+    inset this fills the whole border.
+    """
+
+    def __init__(self, role, px=0, bw=0):
+        Rect.__init__(
+            self, role, start(px, bw), start(px, bw),
+            end(-2 * px, -2 * bw), end(-2 * px, -2 * bw),
+        )
+
+
+class Polygon(_Layer):
+    """
+    A filled polygon. The shape hint can be set to Convex when it is known to be
+    convex, which lets the X server draw it faster.
+    """
+    request = 'FillPoly'
+
+    def __init__(self, role, points, shape=xcffib.xproto.PolyShape.Complex):
+        _Layer.__init__(self, role)
+        self.points = [(_expr(x), _expr(y)) for x, y in points]
+        self.shape = shape
+
+    def geometry(self, borderwidth, outer_w, outer_h):
+        return [
+            xcffib.xproto.POINT.synthetic(x(outer_w, borderwidth), y(outer_h, borderwidth))
+            for x, y in self.points
+        ]
+
+
+_TRAPEZIA = {
+    'top': ((0, 0), (start(0, 1), start(0, 1)), (end(0, -1), start(0, 1)), (end(), 0)),
+    'bottom': ((0, end()), (start(0, 1), end(0, -1)), (end(0, -1), end(0, -1)),
+               (end(), end())),
+    'left': ((0, 0), (start(0, 1), start(0, 1)), (start(0, 1), end(0, -1)), (0, end())),
+    'right': ((end(), 0), (end(0, -1), start(0, 1)), (end(0, -1), end(0, -1)),
+              (end(), end())),
+}
+
+
+class Trapezium(Polygon):
+    """
+    The trapezium covering one side of the border, with mitred corners: top, bottom,
+    left or right.
+    """
+
+    def __init__(self, role, side):
+        Polygon.__init__(
+            self, role, _TRAPEZIA[side], shape=xcffib.xproto.PolyShape.Convex
+        )
+
+
+class Lines(Polygon):
+    """
+    A connected line through a list of points.
+    """
+    request = 'PolyLine'
+
+    def __init__(self, role, points):
+        Polygon.__init__(self, role, points)
+
+
+class Bevel:
+    """
+    A one pixel bevel around the rectangle inset from the outer edges: the top and left
+    sides are drawn in the first role and the bottom and right sides in the second.
+    """
+
+    def __init__(self, light, shadow, px=0, bw=0):
+        x0 = start(px, bw)
+        x1 = end(-px - 1, -bw)
+        self.lines = (
+            Lines(light, [(x0, x1), (x0, x0), (x1, x0)]),
+            Lines(shadow, [(x1, x0), (x1, x1), (x0, x1)]),
+        )
+
+    def expand(self):
+        return self.lines
+
+
+class Style:
+    """
+    A named border style made up of layers drawn using colours assigned by role.
+
+    Styles are immutable, as compiled styles and their cached pixmaps are looked up by
+    the style itself.
+    """
+
+    def __init__(self, name, roles, layers, doc=None):
+        expanded = []
+        for layer in layers:
+            if hasattr(layer, 'expand'):
+                expanded.extend(layer.expand())
+            else:
+                expanded.append(layer)
+        object.__setattr__(self, 'name', name)
+        object.__setattr__(self, 'roles', tuple(roles))
+        object.__setattr__(self, 'layers', tuple(expanded))
+        object.__setattr__(self, '__doc__', doc)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f'{self!r} is immutable')
+
+    def __delattr__(self, name):
+        raise AttributeError(f'{self!r} is immutable')
+
+    def __repr__(self):
+        return '<Style {}>'.format(self.name)
+
+
+def _emitter(request, role, geometry, shape):
+    """
+    Make the function that sends one drawing request for a compiled layer.
+    """
+    if request == 'PolyFillRectangle':
+        def emit(core, pixmap, gcs, args):
+            rects = geometry(*args)
+            core.PolyFillRectangle(pixmap, gcs[role], len(rects), rects)
+    elif request == 'FillPoly':
+        def emit(core, pixmap, gcs, args):
+            points = geometry(*args)
+            core.FillPoly(pixmap, gcs[role], shape, 0, len(points), points)
+    else:
+        def emit(core, pixmap, gcs, args):
+            points = geometry(*args)
+            core.PolyLine(0, pixmap, gcs[role], len(points), points)
+    return emit
+
+
+def _merge(layers):
+    """
+    Group adjacent rectangle layers of the same role so they can be sent together.
+    """
+    groups = []
+    for layer in layers:
+        if (
+            groups and layer.request == 'PolyFillRectangle'
+            and groups[-1][0].request == layer.request
+            and groups[-1][0].role == layer.role
+        ):
+            groups[-1].append(layer)
+        else:
+            groups.append([layer])
+    return groups
+
+
+@functools.lru_cache()
+def compile_style(style):
+    """
+    Compile a Style into a function that can replace xcbq.Window.paint_borders.
+    """
+    index = {role: i for i, role in enumerate(style.roles)}
+    emitters = []
+
+    for group in _merge(style.layers):
+        if len(group) == 1:
+            geometry = group[0].geometry
+        else:
+            def geometry(*args, group=group):
+                return [rect for layer in group for rect in layer.geometry(*args)]
+        emitters.append(_emitter(
+            group[0].request,
+            index[group[0].role],
+            functools.lru_cache(maxsize=64)(geometry),
+            getattr(group[0], 'shape', None),
+        ))
+
+    def paint_borders(self, colors, borderwidth, width, height):
+        if not colors or not borderwidth:
+            return
+
+        if isinstance(colors, str):
+            self.set_attribute(borderpixel=palette.pixel(self.conn, colors))
+            return
+
+        if len(colors) < len(index):
+            self.set_attribute(borderpixel=palette.pixel(self.conn, colors[0]))
+            return
+
+        pixels = tuple(palette.pixel(self.conn, c) for c in colors[:len(index)])
+        gcs = [palette.gc(self.conn, p) for p in pixels]
+        key = (style, width, height, borderwidth, pixels)
+
+        def draw(core, pixmap, outer_w, outer_h):
+            args = (borderwidth, outer_w, outer_h)
+            for emit in emitters:
+                emit(core, pixmap, gcs, args)
+
+        cache.paint(self, key, borderwidth, width, height, draw)
+
+    paint_borders.__name__ = style.name
+    paint_borders.__doc__ = style.__doc__
+    return paint_borders
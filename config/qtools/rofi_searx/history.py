@@ -0,0 +1,135 @@
+"""
+Search query history for the searx plugin.
+
+Each line of the history file holds a count and a query separated by a tab. New
+searches are appended as a count of one, and the file is compacted to one line per
+query once it has grown to twice that. The file is only read when the history is first
+used.
+
+Queries are ranked by how often they were used and then by how recently, and are kept
+in a sorted list so that those sharing a prefix can be found by bisection.
+"""
+
+
+import asyncio
+import bisect
+import heapq
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+from libqtile.log_utils import logger
+
+
+class History:
+    """
+    A ranked, persisted list of past search queries.
+    """
+    # A single writer keeps appends and compactions in order.
+    _executor = ThreadPoolExecutor(max_workers=1)
+
+    def __init__(self, path, limit=1000):
+        self.path = os.path.expanduser(path)
+        self.limit = limit
+        self._entries = None
+        self._keys = []
+        self._ranked = None
+        self._seq = 0
+        self._lines = 0
+
+    def _load(self):
+        self._entries = {}
+        if os.path.isfile(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    for line in f:
+                        count, _, query = line.rstrip('\n').partition('\t')
+                        if query:
+                            self._bump(query, int(count))
+                            self._lines += 1
+            except (OSError, ValueError) as e:
+                logger.exception(
+                    "qtools.rofi_searx: could not read history: {}".format(e)
+                )
+        self._keys = sorted(self._entries)
+
+    def _bump(self, query, count):
+        """
+        Add to the count for a query, returning True if it is new.
+        """
+        self._seq += 1
+        entry = self._entries.get(query)
+        if entry is None:
+            self._entries[query] = [count, self._seq]
+            return True
+        entry[0] += count
+        entry[1] = self._seq
+        return False
+
+    def add(self, query):
+        """
+        Record a search and append it to the history file in the background.
+        """
+        if self._entries is None:
+            self._load()
+        if self._bump(query, 1):
+            bisect.insort(self._keys, query)
+        self._ranked = None
+        self._lines += 1
+
+        if self._lines > 2 * len(self._entries) + 100:
+            contents = ''.join(
+                '{}\t{}\n'.format(count, query) for query, (count, _) in
+                sorted(self._entries.items(), key=lambda e: e[1][1])
+            )
+            self._lines = len(self._entries)
+            args = (self._replace, contents)
+        else:
+            args = (self._append, '1\t{}\n'.format(query))
+        asyncio.get_event_loop().run_in_executor(self._executor, *args)
+
+    def _append(self, line):
+        try:
+            with open(self.path, 'a') as f:
+                f.write(line)
+        except OSError as e:
+            logger.exception("qtools.rofi_searx: could not write history: {}".format(e))
+
+    def _replace(self, contents):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix='.searx_history.')
+            with os.fdopen(fd, 'w') as f:
+                f.write(contents)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.exception("qtools.rofi_searx: could not write history: {}".format(e))
+
+    def suggest(self, prefix='', limit=None):
+        """
+        Get up to limit past queries starting with prefix, best first.
+        """
+        if self._entries is None:
+            self._load()
+        if limit is None:
+            limit = self.limit
+        if prefix:
+            lo = bisect.bisect_left(self._keys, prefix)
+            hi = bisect.bisect_left(self._keys, prefix + '\U0010ffff', lo)
+            candidates = self._keys[lo:hi]
+        else:
+            candidates = self._keys
+        return heapq.nlargest(limit, candidates, key=self._entries.__getitem__)
+
+    def ranked(self):
+        """
+        The best queries overall, cached until the next search is recorded.
+        """
+        if self._ranked is None:
+            self._ranked = self.suggest()
+        return self._ranked
+
+    def __len__(self):
+        if self._entries is None:
+            self._load()
+        return len(self._entries)
@@ -0,0 +1,187 @@
+"""
+Background health checks for searx instances.
+
+Instances are requested periodically in a thread pool and their response times and
+errors recorded in a table of scores. Instances are then chosen at random, weighted
+towards those that respond quickly and reliably, and instances that fail several times
+in a row are left out for a while.
+
+The probe function can be replaced, and any URL can be probed, so the prober can be
+pointed at a local HTTP server to try it out.
+"""
+
+
+import asyncio
+import random
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from libqtile.log_utils import logger
+
+
+def http_probe(url, timeout):
+    """
+    Request an instance's front page, returning the number of seconds taken. Raises an
+    exception if the request fails.
+    """
+    request = urllib.request.Request(url, headers={'User-Agent': 'qtools.rofi_searx'})
+    start = time.monotonic()
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        response.read(1)
+    return time.monotonic() - start
+
+
+class _Score:
+    __slots__ = ('latency', 'errors', 'failures', 'until')
+
+    def __init__(self):
+        self.latency = None
+        self.errors = 0.0
+        self.failures = 0
+        self.until = 0.0
+
+
+class Scores:
+    """
+    Response time and error rate for each instance, as exponentially weighted moving
+    averages.
+    """
+
+    def __init__(self, smoothing=0.3, max_failures=3, quarantine=900):
+        self.smoothing = smoothing
+        self.max_failures = max_failures
+        self.quarantine = quarantine
+        self._scores = {}
+
+    def _get(self, url):
+        score = self._scores.get(url)
+        if score is None:
+            score = self._scores[url] = _Score()
+        return score
+
+    def success(self, url, latency):
+        score = self._get(url)
+        a = self.smoothing
+        if score.latency is None:
+            score.latency = latency
+        else:
+            score.latency = a * latency + (1 - a) * score.latency
+        score.errors = (1 - a) * score.errors
+        score.failures = 0
+        score.until = 0.0
+
+    def failure(self, url, now=None):
+        score = self._get(url)
+        a = self.smoothing
+        score.errors = a + (1 - a) * score.errors
+        score.failures += 1
+        if score.failures >= self.max_failures:
+            if now is None:
+                now = time.monotonic()
+            score.until = now + self.quarantine
+
+    def quarantined(self, url, now=None):
+        score = self._scores.get(url)
+        if score is None:
+            return False
+        if now is None:
+            now = time.monotonic()
+        return score.until > now
+
+    def weight(self, url):
+        """
+        The relative chance of choosing an instance, or None if it is not yet known.
+        """
+        score = self._scores.get(url)
+        if score is None or score.latency is None:
+            return None
+        return (1 - score.errors) / max(score.latency, 0.01)
+
+    def choose(self, instances, now=None):
+        """
+        Choose one of the given instances, weighted by their scores. Instances that have
+        not been probed yet are weighted as an average instance.
+        """
+        if now is None:
+            now = time.monotonic()
+        candidates = [i for i in instances if not self.quarantined(i, now)]
+        if not candidates:
+            candidates = list(instances)
+
+        weights = [self.weight(i) for i in candidates]
+        known = [w for w in weights if w is not None]
+        if not known:
+            return random.choice(candidates)
+        average = sum(known) / len(known)
+        weights = [average if w is None else w for w in weights]
+        return random.choices(candidates, weights)[0]
+
+    def table(self):
+        """
+        Get the current scores, fastest first.
+        """
+        now = time.monotonic()
+        rows = [
+            {
+                'url': url,
+                'latency': score.latency,
+                'error_rate': score.errors,
+                'quarantined': score.until > now,
+            }
+            for url, score in self._scores.items()
+        ]
+        rows.sort(key=lambda r: float('inf') if r['latency'] is None else r['latency'])
+        return rows
+
+
+class Prober:
+    """
+    Periodically probes a list of instances and records the results in a Scores table.
+    The instances argument is a function returning the URLs to probe, so that it always
+    sees the current list.
+    """
+
+    def __init__(self, scores, instances, interval=600, timeout=5, workers=4,
+                 probe=http_probe):
+        self.scores = scores
+        self.instances = instances
+        self.interval = interval
+        self.timeout = timeout
+        self.probe = probe
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await self.probe_all()
+            await asyncio.sleep(self.interval)
+
+    async def probe_all(self):
+        """
+        Probe every instance once, concurrently.
+        """
+        urls = list(self.instances())
+        if urls:
+            await asyncio.gather(*(self._probe(url) for url in urls))
+
+    async def _probe(self, url):
+        loop = asyncio.get_event_loop()
+        try:
+            latency = await loop.run_in_executor(
+                self._executor, self.probe, url, self.timeout
+            )
+        except Exception as e:
+            logger.debug("qtools.rofi_searx: probe of {} failed: {}".format(url, e))
+            self.scores.failure(url)
+        else:
+            self.scores.success(url, latency)
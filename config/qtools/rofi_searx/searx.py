@@ -1,6 +1,6 @@
 """
 Qtile plugin to use rofi to execute a process using the URL for a randomised searx
-instance.
+instance, favouring instances that respond quickly.
 
 Example usage:
 
@@ -14,12 +14,21 @@ Example usage:
 """
 
 
+import asyncio
+import os
 import random
+import re
 import shlex
 import subprocess
 
+from libqtile import hook
+from libqtile.log_utils import logger
+
 from qtools import Notifier
 
+from .history import History
+from .probe import Prober, Scores
+
 
 class Searx(Notifier):
     """
@@ -34,8 +43,21 @@ class Searx(Notifier):
     Searx.remove_last_used can be used to remove the previously used searx instance from
     the instance list. If an instance_file was provided, the last instance will simply
     be commented out in the file and ignored, but not removed. New instances can be
-    added by adding to the file, and either restarting Qtile or binding
-    Searx.lazy_load_instances to a key.
+    added by adding to the file, which is read again whenever its modification time
+    changes. Searx.lazy_load_instances can also be bound to a key to reload it.
+
+    rofi is run as an asyncio subprocess, so Qtile keeps running as normal while the
+    prompt is open. Searching again while a prompt is already open does nothing.
+
+    Unless probe_interval is None, every instance is requested in the background every
+    probe_interval seconds, and instances are chosen at random weighted by how quickly
+    and reliably they respond. Instances that fail max_failures probes in a row are not
+    chosen for quarantine seconds. Searx.scores returns the current table.
+
+    If history_file is set, past queries are saved to it and offered in the rofi prompt
+    ranked by how often and how recently they were used, so a repeated search can be
+    picked from the list. No history is kept by default, as queries would otherwise be
+    written to disk.
     """
     defaults = [
         ('summary', 'Searx', 'Notification summary.'),
@@ -49,14 +71,28 @@ class Searx(Notifier):
                                                          'place the search url.'),
         ('notify_on_remove', True, 'Whether to make a notification when removing a '
                                    'searx instance.'),
+        ('probe_interval', 600, 'Seconds between health checks of all instances, or '
+                                'None to choose instances uniformly at random.'),
+        ('probe_timeout', 5, 'Seconds before a health check is counted as failed.'),
+        ('max_failures', 3, 'Failed health checks in a row before an instance is '
+                            'quarantined.'),
+        ('quarantine', 900, 'Seconds that a failing instance is not used for.'),
+        ('history_file', None, 'File to save past queries to, e.g. '
+                               '~/.cache/qtile/searx_history. None keeps no history.'),
+        ('history_size', 1000, 'Maximum number of past queries offered by rofi.'),
+        ('history_lines', 10, 'Number of lines rofi shows when there is a history.'),
     ]
 
     def __init__(self, **config):
         Notifier.__init__(self, **config)
         self.add_defaults(Searx.defaults)
         self.last_used = None
+        self._prompt = None
+        self._active = list(self.instances)
+        self._offsets = {}
+        self._stat = None
 
-        self.command = ['rofi', '-dmenu', '-l', '0']
+        self.command = ['rofi', '-dmenu']
         if self.prompt:
             self.command.extend(['-p', self.prompt])
         if self.theme:
@@ -65,38 +101,137 @@ class Searx(Notifier):
         if self.instances_file:
             self.load_instances()
 
-    def search(self, qtile=None):
-        output = subprocess.run(
-            self.command, stdout=subprocess.PIPE, universal_newlines=True, check=False
+        self._history = None
+        if self.history_file:
+            self._history = History(self.history_file, self.history_size)
+
+        self._scores = Scores(
+            max_failures=self.max_failures, quarantine=self.quarantine
         )
-        if output.stdout and not output.returncode:
-            if self.instances_file:
-                instance = random.choice(
-                    [i for i in self.instances if not i.startswith('#')]
-                )
+        self._prober = None
+        if self.probe_interval is not None:
+            self._prober = Prober(
+                self._scores, self._active_instances,
+                interval=self.probe_interval, timeout=self.probe_timeout,
+            )
+            hook.subscribe.startup_complete(self._prober.start)
+
+    def _active_instances(self):
+        if self.instances_file:
+            self._check_instances_file()
+        return self._active
+
+    def _check_instances_file(self):
+        """
+        Reload the instances file if it has changed since it was last read.
+        """
+        try:
+            stat = os.stat(self.instances_file)
+        except OSError:
+            return
+        if (stat.st_mtime_ns, stat.st_size) != self._stat:
+            self.load_instances()
+
+    def search(self, qtile=None):
+        if self._prober is not None:
+            self._prober.start()
+        if self._prompt is None or self._prompt.done():
+            self._prompt = asyncio.ensure_future(self._search())
+
+    async def _search(self):
+        suggestions = self._history.ranked() if self._history else []
+        lines = self.history_lines if suggestions else 0
+        try:
+            proc = await asyncio.create_subprocess_exec(
+                *self.command, '-l', str(lines),
+                stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+            )
+        except OSError as e:
+            logger.exception("qtools.rofi_searx: could not run rofi: {}".format(e))
+            return
+        stdout, _ = await proc.communicate('\n'.join(suggestions).encode())
+        if stdout and not proc.returncode:
+            self._open(stdout.decode())
+
+    def _open(self, query):
+        query = query.strip()
+        if query:
+            instances = self._active_instances()
+            if self._prober is not None:
+                instance = self._scores.choose(instances)
             else:
-                instance = random.choice(self.instances)
+                instance = random.choice(instances)
 
-            query = output.stdout.strip()
             url = f"'{instance}/?q={query}&categories=general&language=en-US'"
             command = self.launcher.format(url=url)
             subprocess.Popen(shlex.split(command))
             self.last_used = instance
+            if self._history is not None:
+                self._history.add(query)
 
     def remove_last_used(self, qtile=None):
         if self.last_used:
-            self.instances.remove(self.last_used)
             if self.instances_file:
-                self.instances.append(f'#{self.last_used}')
-                self.save_instances()
-            if self.notify_on_remove:
+                removed = self._comment_out(self.last_used)
+            else:
+                self.instances.remove(self.last_used)
+                self._active.remove(self.last_used)
+                removed = True
+            if removed and self.notify_on_remove:
                 self.show(f'Removed: {self.last_used}')
             self.last_used = None
 
-    def load_instances(self, qtile=None):
-        with open(self.instances_file, 'r') as f:
-            self.instances = f.read().split()
+    def scores(self, qtile=None):
+        """
+        Get the health check results for each instance, fastest first.
+        """
+        return self._scores.table()
 
-    def save_instances(self):
-        with open(self.instances_file, 'w') as f:
-            f.write('\n'.join(self.instances))
+    def load_instances(self, qtile=None):
+        with open(self.instances_file, 'rb') as f:
+            data = f.read()
+            stat = os.fstat(f.fileno())
+        self._stat = (stat.st_mtime_ns, stat.st_size)
+
+        self.instances = []
+        self._active = []
+        # The offsets of every occurrence of each instance that is not commented out.
+        self._offsets = {}
+        for match in re.finditer(rb'\S+', data):
+            instance = match.group().decode()
+            self.instances.append(instance)
+            if not instance.startswith('#'):
+                if instance not in self._offsets:
+                    self._active.append(instance)
+                self._offsets.setdefault(instance, []).append(match.start())
+
+    def _comment_out(self, instance):
+        """
+        Comment out every occurrence of an instance in the instances file. Only the
+        part of the file from the first one on is rewritten. Returns whether the
+        instance was found.
+        """
+        self._check_instances_file()
+        offsets = self._offsets.pop(instance, None)
+        if offsets is None:
+            return False
+        with open(self.instances_file, 'r+b') as f:
+            f.seek(offsets[0])
+            rest = f.read()
+            parts = [
+                rest[start - offsets[0]:end - offsets[0]]
+                for start, end in zip(offsets, offsets[1:] + [offsets[0] + len(rest)])
+            ]
+            f.seek(offsets[0])
+            f.write(b''.join(b'#' + part for part in parts))
+            f.flush()
+            stat = os.fstat(f.fileno())
+        self._stat = (stat.st_mtime_ns, stat.st_size)
+
+        for others in self._offsets.values():
+            others[:] = [
+                other + sum(offset < other for offset in offsets) for other in others
+            ]
+        self.instances = [f'#{i}' if i == instance else i for i in self.instances]
+        self._active.remove(instance)
+        return True
@@ -21,15 +21,221 @@
 
 import json
 import os
-from datetime import datetime, timedelta
+import tempfile
+import threading
+from datetime import date, datetime, time, timedelta
 
-from libqtile import bar
+import cairocffi
+from libqtile import bar, hook, pangocffi, qtile
 from libqtile.log_utils import logger
-from libqtile.utils import get_cache_dir
+from libqtile.popup import Popup
+from libqtile.utils import get_cache_dir, rgb
 from libqtile.widget import base
 
 
 _CACHE = os.path.join(get_cache_dir(), 'habit_tracker_count.json')
+_SURFACES = 8
+_WINDOW = 30
+
+
+class _HabitStats:
+    """
+    Running statistics for one habit, updated in constant time as each day is logged.
+    The last 30 days are kept as a bit mask, most recent day in the lowest bit.
+    """
+    __slots__ = ('last', 'days', 'kept', 'breaks', 'current', 'longest', 'recent')
+
+    def __init__(self):
+        self.last = None
+        self.days = 0
+        self.kept = 0
+        self.breaks = 0
+        self.current = 0
+        self.longest = 0
+        self.recent = 0
+
+    def add(self, day, kept):
+        self.last = day
+        self.days += 1
+        self.recent = ((self.recent << 1) | kept) & ((1 << _WINDOW) - 1)
+        if kept:
+            self.kept += 1
+            self.current += 1
+            self.longest = max(self.longest, self.current)
+        else:
+            if self.current:
+                self.breaks += 1
+            self.current = 0
+
+    def rate(self, days):
+        days = min(days, self.days)
+        if not days:
+            return 0.0
+        return bin(self.recent & ((1 << days) - 1)).count('1') / days
+
+
+class _HabitStore:
+    """
+    The contents of one chain file, shared by every HabitTracker that uses it.
+
+    The file is read once, when the first widget using it is created. After that,
+    changes are made in memory and written back after a short delay, so that a burst
+    of clicks results in a single write. Writing happens in Qtile's executor and goes
+    through a temporary file that is renamed into place, so the file is never seen half
+    written.
+
+    Alongside the chain file is an append-only log with one line per habit per day,
+    recording whether the chain was kept. It is read once, the first time statistics
+    are needed, and new days are appended with the next write.
+    """
+    _stores = {}
+
+    @classmethod
+    def get(cls, path, delay):
+        path = os.path.abspath(os.path.expanduser(path))
+        store = cls._stores.get(path)
+        if store is None:
+            store = cls._stores[path] = cls(path, delay)
+        return store
+
+    def __init__(self, path, delay):
+        self.path = path
+        self.log_path = os.path.splitext(path)[0] + '.log'
+        self.delay = delay
+        self.data = {}
+        self._stats = None
+        self._lines = []
+        self._timer = None
+        self._generation = 0
+        self._written = 0
+        self._lock = threading.Lock()
+
+        if os.path.isfile(path):
+            try:
+                with open(path, 'r') as fd:
+                    self.data.update(json.load(fd))
+            except (OSError, ValueError) as e:
+                logger.exception("HabitTracker: could not read {}: {}".format(path, e))
+
+    def __getitem__(self, habit):
+        return self.data[habit]
+
+    def __contains__(self, habit):
+        return habit in self.data
+
+    def __setitem__(self, habit, value):
+        if self.data.get(habit) == value:
+            return
+        self.data[habit] = value
+        self._generation += 1
+        self.schedule()
+
+    def schedule(self):
+        if self._timer is None:
+            self._timer = qtile.call_later(self.delay, self._flush)
+
+    def setdefault(self, habit, value):
+        """
+        Add a habit if it is missing, without scheduling a write. This is safe to use
+        while the config is being loaded; the habit is saved with the next change or at
+        shutdown.
+        """
+        if habit not in self.data:
+            self.data[habit] = value
+            self._generation += 1
+        return self.data[habit]
+
+    def stats(self, habit):
+        """
+        Get the statistics for a habit, reading the log the first time this is called.
+        """
+        if self._stats is None:
+            self._stats = {}
+            if os.path.isfile(self.log_path):
+                with open(self.log_path, 'r') as fd:
+                    for line in fd:
+                        try:
+                            entry = json.loads(line)
+                            day = date.fromisoformat(entry['date'])
+                            self._add(entry['habit'], day, entry['kept'])
+                        except (ValueError, KeyError):
+                            logger.warning("HabitTracker: bad log line: {}".format(line))
+        if habit not in self._stats:
+            self._stats[habit] = _HabitStats()
+        return self._stats[habit]
+
+    def _add(self, habit, day, kept):
+        stats = self._stats.get(habit)
+        if stats is None:
+            stats = self._stats[habit] = _HabitStats()
+        if stats.last is None or day > stats.last:
+            stats.add(day, kept)
+
+    def log(self, habit, day, kept):
+        """
+        Record whether a habit was kept on a given day. The line is written with the
+        next flush.
+        """
+        stats = self.stats(habit)
+        if stats.last is not None and day <= stats.last:
+            return
+        stats.add(day, kept)
+        self._lines.append(json.dumps(
+            {'habit': habit, 'date': day.isoformat(), 'kept': kept}
+        ))
+
+    def _flush(self):
+        self._timer = None
+        lines, self._lines = self._lines, []
+        qtile.run_in_executor(
+            self._write, self._generation, json.dumps(self.data), lines
+        )
+
+    def flush(self):
+        """
+        Write any pending changes immediately.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        lines, self._lines = self._lines, []
+        self._write(self._generation, json.dumps(self.data), lines)
+
+    def _write(self, generation, contents, lines):
+        with self._lock:
+            if lines:
+                try:
+                    with open(self.log_path, 'a') as f:
+                        f.write('\n'.join(lines) + '\n')
+                except OSError as e:
+                    logger.exception(
+                        "HabitTracker: could not write {}: {}".format(self.log_path, e)
+                    )
+            if generation <= self._written:
+                return
+            directory = os.path.dirname(self.path)
+            tmp = None
+            try:
+                os.makedirs(directory, exist_ok=True)
+                fd, tmp = tempfile.mkstemp(dir=directory, prefix='.habit_tracker.')
+                with os.fdopen(fd, 'w') as f:
+                    f.write(contents)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp, self.path)
+                self._written = generation
+            except OSError as e:
+                logger.exception(
+                    "HabitTracker: could not write {}: {}".format(self.path, e)
+                )
+                if tmp is not None and os.path.exists(tmp):
+                    os.remove(tmp)
+
+
+@hook.subscribe.shutdown
+def _flush_stores():
+    for store in _HabitStore._stores.values():
+        store.flush()
 
 
 class HabitTracker(base._Widget):
@@ -38,7 +244,8 @@ class HabitTracker(base._Widget):
 
     The current chain lengths are stored in a JSON file containing a dictionary where
     each key is the name of a habit. This habit can be passed to the widget to identify
-    a chain.
+    a chain. Widgets sharing a file share one in-memory copy of it, and changes are
+    written back shortly after they are made.
 
     The chain can be drawn in different styles:
 
@@ -48,6 +255,14 @@ class HabitTracker(base._Widget):
           scheme using the base (rows + 1). For example, HabitTracker(rows=1) would draw
           a single row of squares that are filled in to represent a binary count.
 
+    Rendered chains are cached, so the widget is only drawn again when the chain or its
+    appearance changes. The chain grows by itself at local midnight.
+
+    Every day is also logged as kept or broken, from which the current and longest
+    streaks, number of breaks and completion rates over the last 7 and 30 days are
+    kept up to date. These are available with the stats command and shown in a tooltip
+    when hovering over the widget.
+
     """
     defaults = [
         ("colour", "1667EB", "Fill colour."),
@@ -59,6 +274,16 @@ class HabitTracker(base._Widget):
         ("rows", 2, "Number of rows."),
         ("columns", 4, "Number of columns."),
         ("blank_colour", None, "Colour for placeholder blocks."),
+        ("save_delay", 2, "Seconds to wait after a change before writing the chain file."),
+        ("tooltip", True, "Show statistics in a popup when hovering over the widget."),
+        (
+            "tooltip_format",
+            "streak {current}, best {longest}\n7 days {rate_7:.0%}, 30 days {rate_30:.0%}",
+            "Tooltip text. Uses the keys returned by the stats command.",
+        ),
+        ("tooltip_font", "sans", "Tooltip font."),
+        ("tooltip_fontsize", 12, "Tooltip font size."),
+        ("tooltip_padding", 6, "Padding around tooltip text."),
     ]
 
     def __init__(self, **config):
@@ -66,6 +291,10 @@ class HabitTracker(base._Widget):
         self.add_defaults(HabitTracker.defaults)
         self._chain = None
         self._block_size = 0
+        self._surfaces = {}
+        self._drawn = None
+        self._popup = None
+        self._rollover_timer = None
 
         self._load_chain()
 
@@ -81,25 +310,55 @@ class HabitTracker(base._Widget):
             self.mouse_callbacks.update({'Button3': self.cmd_decrement})
 
     def _load_chain(self):
-        if os.path.isfile(self.chain_file):
-            with open(self.chain_file, 'r') as fd:
-                cache = json.load(fd)
-            if self.habit in cache.keys():
-                start_date = datetime.strptime(cache.get(self.habit), "%Y-%m-%d")
-                self._chain = (datetime.now() - start_date).days
-                return
-        self._chain = 0
-        self._save_chain()
+        self._store = _HabitStore.get(self.chain_file, self.save_delay)
+        start_date = self._store.setdefault(
+            self.habit, datetime.now().strftime("%Y-%m-%d")
+        )
+        start_date = datetime.strptime(start_date, "%Y-%m-%d")
+        self._chain = (datetime.now() - start_date).days
+        self._log_days()
+
+    def _log_days(self):
+        """
+        Log every finished day since the last logged one. A day was kept if the chain
+        had started by then, so the day it started on counts as kept.
+        """
+        start = datetime.strptime(self._store[self.habit], "%Y-%m-%d").date()
+        today = date.today()
+        stats = self._store.stats(self.habit)
+        day = start if stats.last is None else stats.last + timedelta(days=1)
+        while day < today:
+            self._store.log(self.habit, day, start <= day)
+            day += timedelta(days=1)
+
+    def _configure(self, qtile, bar):
+        base._Widget._configure(self, qtile, bar)
+        self._schedule_rollover()
+
+    def _schedule_rollover(self):
+        # The widget is configured again whenever its bar is, keep only one timer.
+        if self._rollover_timer is not None:
+            self._rollover_timer.cancel()
+        now = datetime.now()
+        midnight = datetime.combine(now.date() + timedelta(days=1), time())
+        # A second late is better than waking just before midnight and sleeping again.
+        self._rollover_timer = self.timeout_add(
+            (midnight - now).total_seconds() + 1, self._rollover
+        )
+
+    def _rollover(self):
+        start_date = datetime.strptime(self._store[self.habit], "%Y-%m-%d")
+        chain = (datetime.now() - start_date).days
+        if chain != self._chain:
+            self._chain = chain
+            self.draw()
+        self._log_days()
+        self._store.schedule()
+        self._schedule_rollover()
 
     def _save_chain(self):
-        cache = {}
-        if os.path.isfile(self.chain_file):
-            with open(self.chain_file, 'r') as fd:
-                cache.update(json.load(fd))
         start_date = datetime.now() - timedelta(days=self._chain)
-        cache.update({self.habit: start_date.strftime("%Y-%m-%d")})
-        with open(self.chain_file, 'w') as fd:
-            json.dump(cache, fd)
+        self._store[self.habit] = start_date.strftime("%Y-%m-%d")
 
     def cmd_increment(self, qtile=None):
         self._chain += 1
@@ -117,6 +376,77 @@ class HabitTracker(base._Widget):
         self._save_chain()
         self.draw()
 
+    def cmd_stats(self):
+        """
+        Get statistics for this habit. Today is counted in the current streak but not
+        in the completion rates until it is over.
+        """
+        stats = self._store.stats(self.habit)
+        return {
+            'habit': self.habit,
+            'current': self._chain,
+            'longest': max(stats.longest, self._chain),
+            'breaks': stats.breaks,
+            'days': stats.days,
+            'kept': stats.kept,
+            'rate_7': stats.rate(7),
+            'rate_30': stats.rate(30),
+        }
+
+    def mouse_enter(self, x, y):
+        if not self.tooltip:
+            return
+        lines = [
+            pangocffi.markup_escape_text(line)
+            for line in self.tooltip_format.format(**self.cmd_stats()).split('\n')
+        ]
+        layout = self.drawer.textlayout(
+            max(lines, key=len), self.colour, self.tooltip_font, self.tooltip_fontsize,
+            None, markup=True,
+        )
+        line_height = layout.height
+        width = layout.width + 2 * self.tooltip_padding
+        height = len(lines) * line_height + 2 * self.tooltip_padding
+        layout.finalize()
+
+        popup = self._popup
+        if popup is None or (popup.width, popup.height) != (width, height):
+            if popup is not None:
+                popup.kill()
+            popup = self._popup = Popup(
+                self.qtile, width=width, height=height,
+                font=self.tooltip_font, font_size=self.tooltip_fontsize,
+                background=self.bar.background, foreground=self.colour,
+                horizontal_padding=self.tooltip_padding,
+                vertical_padding=self.tooltip_padding,
+            )
+
+        popup.x = self.bar.x + self.offset
+        if self.bar.y > 0:
+            popup.y = self.bar.y - height
+        else:
+            popup.y = self.bar.y + self.bar.height
+        popup.clear()
+        for num, line in enumerate(lines):
+            popup.text = line
+            popup.draw_text(y=self.tooltip_padding + num * line_height)
+        popup.place()
+        popup.unhide()
+        popup.draw()
+
+    def mouse_leave(self, x, y):
+        if self._popup is not None:
+            self._popup.hide()
+
+    def finalize(self):
+        if self._popup is not None:
+            self._popup.kill()
+            self._popup = None
+        if self._rollover_timer is not None:
+            self._rollover_timer.cancel()
+            self._rollover_timer = None
+        base._Widget.finalize(self)
+
     def calculate_length(self):
         space = self.bar.height - self.margin_y * 2
         self._block_size = space // (2 * self.rows - 1)
@@ -124,23 +454,45 @@ class HabitTracker(base._Widget):
         return length + self.margin_x * 2
 
     def draw(self):
-        self.drawer.clear(self.background or self.bar.background)
-        getattr(self, "draw_{0}".format(self.style))()
+        background = self.background or self.bar.background
+        key = (
+            self._chain, self.style, self.length, self.bar.height, self.colour,
+            self.blank_colour, background,
+        )
+        if key != self._drawn:
+            surface = self._surfaces.get(key)
+            if surface is None:
+                surface = self._render(key)
+            self.drawer.clear(background)
+            self.drawer.ctx.set_source_surface(surface)
+            self.drawer.ctx.paint()
+            self._drawn = key
+        self.drawer.draw(offsetx=self.offset, width=self.length)
 
-    def draw_chain(self):
+    def _render(self, key):
+        surface = cairocffi.ImageSurface(
+            cairocffi.FORMAT_ARGB32, self.length, self.bar.height
+        )
+        getattr(self, "draw_{0}".format(self.style))(cairocffi.Context(surface))
+        if len(self._surfaces) >= _SURFACES:
+            del self._surfaces[next(iter(self._surfaces))]
+        self._surfaces[key] = surface
+        return surface
+
+    def draw_chain(self, ctx):
         block_size = self._block_size
         start_y = self.bar.height - self.margin_y - block_size
 
         if self.blank_colour:
-            self.drawer.set_source_rgb(self.blank_colour)
+            ctx.set_source_rgba(*rgb(self.blank_colour))
             for col in range(self.columns):
                 x_pos = self.margin_x + col * 2 * block_size
                 for row in range(self.rows):
                     y_pos = start_y - row * 2 * block_size
-                    self.drawer.ctx.rectangle(x_pos, y_pos, block_size, block_size)
-            self.drawer.ctx.fill()
+                    ctx.rectangle(x_pos, y_pos, block_size, block_size)
+            ctx.fill()
 
-        self.drawer.set_source_rgb(self.colour)
+        ctx.set_source_rgba(*rgb(self.colour))
         chain = self._chain
         for col in range(chain // self.rows + 1):
             x_pos = self.margin_x + col * 2 * block_size
@@ -149,27 +501,25 @@ class HabitTracker(base._Widget):
             if col % 2:
                 rows = [self.rows - 1 - i for i in rows]
             for row in rows:
-                chain % ((col + 1) * self.rows)
                 y_pos = start_y - row * 2 * block_size
-                self.drawer.ctx.rectangle(x_pos, y_pos, block_size, block_size)
+                ctx.rectangle(x_pos, y_pos, block_size, block_size)
 
-        self.drawer.ctx.fill()
-        self.drawer.draw(offsetx=self.offset, width=self.length)
+        ctx.fill()
 
-    def draw_base(self):
+    def draw_base(self, ctx):
         block_size = self._block_size
         start_y = self.bar.height - self.margin_y - block_size
 
         if self.blank_colour:
-            self.drawer.set_source_rgb(self.blank_colour)
+            ctx.set_source_rgba(*rgb(self.blank_colour))
             for col in range(self.columns):
                 x_pos = self.margin_x + col * 2 * block_size
                 for row in range(self.rows):
                     y_pos = start_y - row * 2 * block_size
-                    self.drawer.ctx.rectangle(x_pos, y_pos, block_size, block_size)
-            self.drawer.ctx.fill()
+                    ctx.rectangle(x_pos, y_pos, block_size, block_size)
+            ctx.fill()
 
-        self.drawer.set_source_rgb(self.colour)
+        ctx.set_source_rgba(*rgb(self.colour))
         chain = self._chain
         for col in reversed(range(self.columns)):
             units, chain = divmod(chain, (self.rows + 1) ** col)
@@ -177,7 +527,6 @@ class HabitTracker(base._Widget):
                 x_pos = self.margin_x + col * 2 * block_size
                 for row in range(units):
                     y_pos = start_y - row * 2 * block_size
-                    self.drawer.ctx.rectangle(x_pos, y_pos, block_size, block_size)
+                    ctx.rectangle(x_pos, y_pos, block_size, block_size)
 
-        self.drawer.ctx.fill()
-        self.drawer.draw(offsetx=self.offset, width=self.length)
+        ctx.fill()
@@ -1,2 +1,2 @@
-from .xresources import get
-__all__ = ('get',)
+from .xresources import Resources, get, load
+__all__ = ('Resources', 'get', 'load')
@@ -1,5 +1,14 @@
 """
 Qtile helper to get X resources from the root window.
+
+Example usage:
+
+    from qtools import xresources
+
+    res = xresources.load()
+    res.colour('st.background', 'St.Background')
+    res.integer('xterm*borderWidth', default=2)
+
 """
 
 
@@ -10,6 +19,263 @@ import xcffib.xproto
 from libqtile.log_utils import logger
 
 
+_TRUE = {'true', 'on', 'yes', '1'}
+_FALSE = {'false', 'off', 'no', '0'}
+_MISSING = object()
+
+
+class _Node:
+    """
+    One level of the resource database. Children are keyed on (binding, component)
+    where binding is '.' (tight) or '*' (loose).
+    """
+    __slots__ = ('children', 'loose', 'value')
+
+    def __init__(self):
+        self.children = {}
+        self.loose = False
+        self.value = _MISSING
+
+
+class Resources:
+    """
+    An indexed X resource database.
+
+    Resource lines are parsed once into a prefix tree, and queries are resolved using
+    the same precedence rules as Xlib's XrmGetResource: at each level a matching
+    component beats a skipped one, a name beats a class which beats '?', and a tight
+    binding beats a loose one. Query results, including typed conversions, are
+    memoized so repeated lookups are a single dictionary hit.
+    """
+
+    def __init__(self, resource_string=''):
+        self._root = _Node()
+        self._flat = {}
+        self._memo = {}
+        self.parse(resource_string)
+
+    def parse(self, resource_string):
+        """
+        Add the resources contained in a resource string, as found in the
+        RESOURCE_MANAGER property or an Xresources file, to the database.
+        """
+        pending = ''
+        for line in resource_string.splitlines():
+            if line.endswith('\\') and not line.endswith('\\\\'):
+                pending += line[:-1]
+                continue
+            line = pending + line
+            pending = ''
+
+            stripped = line.lstrip()
+            if not stripped or stripped[0] in '!#':
+                continue
+            key, sep, value = stripped.partition(':')
+            if not sep:
+                continue
+            key = key.strip()
+            if key:
+                self.insert(key, value.lstrip(' \t'))
+
+    def insert(self, specifier, value):
+        """
+        Add a single resource e.g. insert('XTerm*background', '#000000').
+        """
+        node = self._root
+        binding = '.'
+        component = ''
+        for char in specifier:
+            if char in '.*':
+                if component:
+                    node = self._child(node, binding, component)
+                    binding = '.'
+                    component = ''
+                if char == '*':
+                    binding = '*'
+            elif not char.isspace():
+                component += char
+        if not component:
+            return
+        node = self._child(node, binding, component)
+        node.value = value
+        self._flat[specifier.lstrip('*.')] = value
+        self._memo.clear()
+
+    @staticmethod
+    def _child(node, binding, component):
+        key = (binding, component)
+        child = node.children.get(key)
+        if child is None:
+            child = node.children[key] = _Node()
+            if binding == '*':
+                node.loose = True
+        return child
+
+    def query(self, name, cls=None, default=None):
+        """
+        Look up a resource by its fully qualified name, e.g. 'st.color1', and
+        optionally its class e.g. 'St.Color1'. If no class is given, the name is used
+        in its place.
+        """
+        key = ('', name, cls)
+        try:
+            value = self._memo[key]
+        except KeyError:
+            names = tuple(name.split('.'))
+            classes = names if cls is None else tuple(cls.split('.'))
+            if len(names) != len(classes):
+                raise ValueError(
+                    "qtools.xresources: name {} and class {} differ in length."
+                    .format(name, cls)
+                )
+            value = self._memo[key] = _search(self._root, names, classes, 0, False)
+        return default if value is _MISSING else value
+
+    def colour(self, name, cls=None, default=None):
+        """
+        Look up a colour, normalised to '#rrggbb'. Both '#rgb' and 'rgb:r/g/b' forms
+        are accepted.
+        """
+        return self._typed('colour', _to_colour, name, cls, default)
+
+    def integer(self, name, cls=None, default=None):
+        """
+        Look up an integer. Hexadecimal values prefixed with '0x' are accepted.
+        """
+        return self._typed('integer', _to_integer, name, cls, default)
+
+    def boolean(self, name, cls=None, default=None):
+        """
+        Look up a boolean: one of true/false, on/off, yes/no or 1/0.
+        """
+        return self._typed('boolean', _to_boolean, name, cls, default)
+
+    def _typed(self, kind, convert, name, cls, default):
+        key = (kind, name, cls)
+        try:
+            value = self._memo[key]
+        except KeyError:
+            raw = self.query(name, cls, _MISSING)
+            value = _MISSING
+            if raw is not _MISSING:
+                try:
+                    value = convert(raw)
+                except ValueError:
+                    logger.warning(
+                        "qtools.xresources: {} is not a valid {}: {}"
+                        .format(name, kind, raw)
+                    )
+            self._memo[key] = value
+        return default if value is _MISSING else value
+
+    def as_dict(self):
+        """
+        All resources keyed on their specifiers, with any leading '*.' stripped.
+        """
+        return dict(self._flat)
+
+    def __len__(self):
+        return len(self._flat)
+
+
+def _search(node, names, classes, index, skipping):
+    if index == len(names):
+        return _MISSING if skipping else node.value
+
+    for component in (names[index], classes[index], '?'):
+        bindings = ('*',) if skipping else ('.', '*')
+        for binding in bindings:
+            child = node.children.get((binding, component))
+            if child is not None:
+                value = _search(child, names, classes, index + 1, False)
+                if value is not _MISSING:
+                    return value
+
+    if node.loose:
+        return _search(node, names, classes, index + 1, True)
+    return _MISSING
+
+
+def _to_colour(value):
+    value = value.strip()
+    if value.startswith('#'):
+        digits = value[1:]
+        if len(digits) == 3:
+            digits = ''.join(c * 2 for c in digits)
+        elif len(digits) in (9, 12):
+            step = len(digits) // 3
+            digits = ''.join(digits[i:i + 2] for i in range(0, len(digits), step))
+        if len(digits) != 6:
+            raise ValueError(value)
+        int(digits, 16)
+        return '#' + digits.lower()
+    if value.startswith('rgb:'):
+        parts = value[4:].split('/')
+        if len(parts) != 3:
+            raise ValueError(value)
+        channels = []
+        for part in parts:
+            if not 1 <= len(part) <= 4:
+                raise ValueError(value)
+            scaled = int(part, 16) * 255 // (16 ** len(part) - 1)
+            channels.append('{:02x}'.format(scaled))
+        return '#' + ''.join(channels)
+    raise ValueError(value)
+
+
+def _to_integer(value):
+    return int(value.strip(), 0)
+
+
+def _to_boolean(value):
+    value = value.strip().lower()
+    if value in _TRUE:
+        return True
+    if value in _FALSE:
+        return False
+    raise ValueError(value)
+
+
+def load(DISPLAY=None):
+    """
+    Read the RESOURCE_MANAGER property of an X server's root window into an indexed
+    Resources database.
+
+    Parameters
+    ==========
+    DISPLAY : str (optional)
+        DISPLAY name to query. This will be taken from the environment if not specified.
+
+    Returns
+    =======
+    resources: Resources
+        The parsed resource database. This is empty if the connection failed.
+
+    """
+    if DISPLAY is None:
+        DISPLAY = os.environ.get("DISPLAY")
+
+    try:
+        conn = xcffib.connect(display=DISPLAY)
+    except xcffib.ConnectionException as e:
+        logger.exception(e)
+        return Resources()
+
+    try:
+        root = conn.get_setup().roots[0].root
+        atom = conn.core.InternAtom(False, 16, 'RESOURCE_MANAGER').reply().atom
+
+        reply = conn.core.GetProperty(
+            False, root, atom,
+            xcffib.xproto.Atom.STRING,
+            0, (2 ** 32) - 1
+        ).reply()
+    finally:
+        conn.disconnect()
+
+    return Resources(reply.value.buf().decode("utf-8", "replace"))
+
+
 def get(DISPLAY=None, defaults=None):
     """
     Get the X resources in an X servers resource manager.
@@ -28,38 +294,13 @@ def get(DISPLAY=None, defaults=None):
     resources: dict
         Dictionary containing all (available) X resources. Resources that are specified
         in an Xresources/Xdefaults file as wildcards e.g. '*.color1' have the leading
-        '*.' stripped.
+        '*.' stripped. Use load() instead to resolve wildcards properly.
 
     """
-    if DISPLAY is None:
-        DISPLAY = os.environ.get("DISPLAY")
-
     if defaults is None:
         resources = {}
     else:
         resources = defaults
 
-    try:
-        conn = xcffib.connect(display=DISPLAY)
-    except xcffib.ConnectionException as e:
-        logger.exception(e)
-        return resources
-
-    root = conn.get_setup().roots[0].root
-    atom = conn.core.InternAtom(False, 16, 'RESOURCE_MANAGER').reply().atom
-
-    reply = conn.core.GetProperty(
-        False, root, atom,
-        xcffib.xproto.Atom.STRING,
-        0, (2 ** 32) - 1
-    ).reply()
-    conn.disconnect()
-
-    resource_string = reply.value.buf().decode("utf-8")
-    resource_list = filter(None, resource_string.split('\n'))
-
-    for resource in resource_list:
-        key, value = resource.split(':\t')
-        resources[key.strip('*.')] = value
-
+    resources.update(load(DISPLAY).as_dict())
     return resources
@@ -0,0 +1,450 @@
+"""
+Reload the parts of the config that changed, without restarting Qtile.
+
+Restarting re-imports every module of the config and recreates everything built from
+it, from bars to the connections that plugins hold open. reload_config instead only
+re-imports the config modules whose files changed since they were loaded, along with
+the modules that import them (found by reading their import statements), and then
+applies the difference to the running Qtile:
+
+- keys and mouse bindings are regrabbed, and bindings that are gone are ungrabbed,
+- groups that were added are created, groups that were removed are deleted and their
+  windows moved, and the others keep their windows,
+- each group gets new instances of the layouts, with its windows added back,
+- the widgets of each bar that are created with the same keyword arguments as before
+  (functions among them compared by name), and whose class did not change, are kept,
+  with their state. Only the others are replaced.
+
+Anything held by a module that is not re-imported stays as it is, like notification
+history or connections to MPD or PulseAudio. A module that is re-imported has its
+shutdown hooks called first, and all of its hooks removed, so that it can subscribe
+them again.
+
+Changing this module, or something like the number of screens, still needs a restart.
+"""
+import ast
+import importlib
+import importlib.util
+import os
+import sys
+import time
+import types
+import weakref
+
+from libqtile import hook
+from libqtile.bar import Bar
+from libqtile.confreader import Config
+from libqtile.log_utils import logger
+from libqtile.scratchpad import ScratchPad
+from libqtile.widget.base import _Widget
+
+_ROOT = __name__.rpartition('.')[0]
+_BINDINGS = ('keys', 'mouse', 'groups', 'layouts', 'floating_layout', 'screens')
+
+_mtimes = {}
+# The keyword arguments each running widget was created with, to tell whether a widget
+# created by a reload is the same as a running one.
+_widgets = weakref.WeakKeyDictionary()
+
+
+def _modules():
+    return {
+        name: module for name, module in list(sys.modules.items())
+        if (name == _ROOT or name.startswith(_ROOT + '.'))
+        and getattr(module, '__file__', None)
+    }
+
+
+def _mtime(module):
+    try:
+        return os.stat(module.__file__).st_mtime_ns
+    except OSError:
+        return None
+
+
+def remember(screens):
+    """
+    Record the state of the config as it was loaded. This is called once the config
+    package has been imported, before Qtile configures anything.
+    """
+    for name, module in _modules().items():
+        _mtimes[name] = _mtime(module)
+    _remember_widgets(screens)
+
+
+def _code(code):
+    # Line numbers are left out, so that moving a function does not change it.
+    consts = tuple(
+        _code(const) if isinstance(const, types.CodeType) else const
+        for const in code.co_consts
+    )
+    return code.co_code, consts, code.co_names
+
+
+def _cell(cell):
+    try:
+        value = cell.cell_contents
+    except ValueError:
+        return None
+    if callable(value):
+        return getattr(value, '__qualname__', value)
+    return _comparable(value)
+
+
+def _comparable(value):
+    """
+    value with the functions in it replaced by their names and code, as a re-imported
+    module has new functions that are the same as the old ones. Every lambda has the
+    same name, so the name alone would hide an edit to one.
+    """
+    if isinstance(value, dict):
+        return {k: _comparable(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return type(value)(_comparable(v) for v in value)
+    if callable(value):
+        code = getattr(value, '__code__', None)
+        if code is None:
+            return getattr(value, '__qualname__', value)
+        # The values a closure was made with matter too. Functions among them are
+        # only named, as a recursive closure would otherwise never end.
+        cells = tuple(
+            _cell(cell) for cell in getattr(value, '__closure__', None) or ()
+        )
+        defaults = _comparable(getattr(value, '__defaults__', None))
+        return value.__qualname__, _code(code), cells, defaults
+    return value
+
+
+def _kwargs(widget):
+    # Configurable keeps the keyword arguments it was created with.
+    return _comparable(getattr(widget, '_user_config', {}))
+
+
+def _remember_widgets(screens):
+    for screen in screens:
+        for bar in (screen.top, screen.bottom, screen.left, screen.right):
+            for widget in getattr(bar, 'widgets', ()):
+                if widget not in _widgets:
+                    _widgets[widget] = _kwargs(widget)
+
+
+def _imports(module, modules):
+    """The config modules that module imports from"""
+    with open(module.__file__) as f:
+        tree = ast.parse(f.read(), module.__file__)
+    package = module.__package__
+    found = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom):
+            base = node.module or ''
+            if node.level:
+                base = importlib.util.resolve_name('.' * node.level + base, package)
+            # The names imported from a package can be its submodules, and importing
+            # only submodules does not depend on the package itself.
+            names = [f'{base}.{alias.name}' for alias in node.names]
+            if not all(name in modules for name in names):
+                names.append(base)
+        else:
+            continue
+        found.update(name for name in names if name in modules)
+    found.discard(module.__name__)
+    return found
+
+
+def _to_reload(modules, changed):
+    """
+    The changed modules and every module that imports one of them, ordered so that
+    each comes after the modules it imports.
+    """
+    imports = {name: _imports(module, modules) for name, module in modules.items()}
+    stale = set(changed)
+    while True:
+        importers = {
+            name for name, imported in imports.items()
+            if name not in stale and imported & stale
+        }
+        if not importers:
+            break
+        stale |= importers
+
+    order = []
+    seen = set()
+
+    def visit(name):
+        if name in seen:
+            return
+        seen.add(name)
+        for imported in sorted(imports[name] & stale):
+            visit(imported)
+        order.append(name)
+
+    for name in sorted(stale):
+        visit(name)
+    return order
+
+
+def _unsubscribe(owned):
+    """Remove the hook subscriptions for which owned(func) is true"""
+    for event, funcs in list(hook.subscriptions.items()):
+        for func in [f for f in funcs if owned(f)]:
+            getattr(hook.unsubscribe, event)(func)
+
+
+def _shut_down(name):
+    """Call a module's shutdown hooks, then remove all of its hooks"""
+    def owned(func):
+        return getattr(func, '__module__', None) == name
+
+    for func in [f for f in hook.subscriptions.get('shutdown', []) if owned(f)]:
+        try:
+            func()
+        except Exception:
+            logger.exception(f'Error in shutdown hook of {name}')
+    _unsubscribe(owned)
+
+
+def _apply_keys(qtile, keys):
+    old = {(key.key, frozenset(key.modifiers)): key for key in qtile.config.keys}
+    new = {(key.key, frozenset(key.modifiers)) for key in keys}
+    qtile.config.keys = keys
+    if qtile.current_chord:
+        # The config keys are grabbed again once the chord is left.
+        qtile.ungrab_chord()
+        return
+    for combination, key in old.items():
+        if combination not in new:
+            qtile.ungrab_key(key)
+    for key in keys:
+        qtile.grab_key(key)
+
+
+def _apply_mouse(qtile, mouse):
+    # Qtile adds a click of its own to the end of the config's mouse bindings.
+    qtile.config.mouse = tuple(mouse) + tuple(qtile.config.mouse[-1:])
+    qtile.mouse_map.clear()
+    for binding in qtile.config.mouse:
+        qtile.mouse_map.setdefault(binding.button_code, []).append(binding)
+    qtile.grab_mouse()
+
+
+def _relayout(group, layouts):
+    """Give group new instances of layouts and add its windows back to them"""
+    name = group.layout.name
+    if group.screen is not None:
+        group.layout.hide()
+    for layout in group.layouts:
+        layout.finalize()
+    group.layouts = [layout.clone(group) for layout in layouts]
+    names = [layout.name for layout in group.layouts]
+    group.current_layout = names.index(name) if name in names else 0
+
+    # Add them least recently focused first, so that the focus order is kept.
+    history = [w for w in group.focus_history if w in group.windows]
+    windows = [w for w in group.windows if w not in history] + history
+    for win in windows:
+        if not win.floating:
+            for layout in group.layouts:
+                layout.add(win)
+    if group.current_window is not None:
+        group.layout.focus(group.current_window)
+    if group.screen is not None:
+        group.layout.show(group.screen.get_rect())
+
+
+def _apply_floating_layout(qtile, floating_layout):
+    qtile.config.floating_layout = floating_layout
+    for group in qtile.groups:
+        if isinstance(group, ScratchPad):
+            continue
+        for win in group.windows:
+            if win.floating:
+                group.floating_layout.remove(win)
+                floating_layout.add(win)
+        group.floating_layout = floating_layout
+
+
+def _apply_groups(qtile, groups):
+    old = qtile.config.groups
+    qtile.config.groups = groups
+    dgroups = qtile.dgroups
+    # Replace the rules made for the groups' matches.
+    dgroups.rules = [
+        rule for rule in dgroups.rules
+        if not any(rule.matchlist is group.matches for group in old)
+    ]
+    dgroups.groups = groups
+    for group in groups:
+        dgroups.add_dgroup(group, group.init and group.name not in qtile.groups_map)
+        live = qtile.groups_map.get(group.name)
+        if live is not None:
+            live.label = group.label
+
+    names = [group.name for group in groups]
+    for group in old:
+        if group.name not in names and group.name in qtile.groups_map:
+            dgroups.groups_map.pop(group.name, None)
+            try:
+                qtile.delete_group(group.name)
+            except ValueError as e:
+                logger.warning(f'Could not delete group {group.name}: {e}')
+
+    qtile.groups.sort(
+        key=lambda g: names.index(g.name) if g.name in names else len(names)
+    )
+    hook.fire('changegroup')
+    qtile.update_net_desktops()
+
+
+def _same_widget(old, new):
+    created = _widgets.get(old)
+    return created is not None and type(old) is type(new) and created == _kwargs(new)
+
+
+def _retire(qtile, widget):
+    if qtile.widgets_map.get(widget.name) is widget:
+        del qtile.widgets_map[widget.name]
+    _unsubscribe(lambda func: getattr(func, '__self__', None) is widget)
+    widget.finalize()
+    # Timers the widget already started still run once, with nothing to draw on.
+    widget.timeout_add = lambda *args, **kwargs: None
+    widget.draw = lambda: None
+
+
+def _apply_widgets(qtile, bar, widgets):
+    """Keep the widgets of bar that are unchanged in widgets, replace the rest"""
+    unused = list(bar.widgets)
+    merged = []
+    for widget in widgets:
+        same = next((old for old in unused if _same_widget(old, widget)), None)
+        if same is not None:
+            unused.remove(same)
+        merged.append(same or widget)
+    for widget in unused:
+        _retire(qtile, widget)
+
+    bar.widgets = merged
+    for widget in merged:
+        widget._test_orientation_compatibility(bar.horizontal)
+        if not widget.configured:
+            qtile.register_widget(widget)
+            widget._configure(qtile, bar)
+    bar.draw()
+
+
+def _apply_screens(qtile, screens):
+    for screen, new in zip(qtile.screens, screens):
+        for position in ('top', 'bottom', 'left', 'right'):
+            old_bar, new_bar = getattr(screen, position), getattr(new, position)
+            if old_bar is new_bar:
+                continue
+            if (
+                isinstance(old_bar, Bar) and type(old_bar) is type(new_bar)
+                and old_bar.initial_size == new_bar.initial_size
+                and old_bar._user_config == new_bar._user_config
+            ):
+                _apply_widgets(qtile, old_bar, new_bar.widgets)
+                continue
+
+            if isinstance(old_bar, Bar):
+                for widget in old_bar.widgets:
+                    _retire(qtile, widget)
+                old_bar.finalize()
+                qtile.windows_map.pop(old_bar.window.window.wid, None)
+                old_bar.window.kill()
+            setattr(screen, position, new_bar)
+            if new_bar is not None:
+                new_bar._configure(qtile, screen)
+    _remember_widgets(qtile.screens)
+    if len(screens) != len(qtile.screens):
+        logger.warning('The number of screens changed, restart Qtile to apply it')
+
+
+def _apply(qtile, old, module):
+    new = {name: getattr(module, name, old[name]) for name in _BINDINGS}
+    applied = [name for name in _BINDINGS if new[name] is not old[name]]
+
+    for name, _ in Config.settings_keys:
+        if name not in _BINDINGS and name != 'main' and hasattr(module, name):
+            setattr(qtile.config, name, getattr(module, name))
+    if getattr(module, 'widget_defaults', None):
+        _Widget.global_defaults = module.widget_defaults
+
+    if 'keys' in applied:
+        _apply_keys(qtile, new['keys'])
+    if 'mouse' in applied:
+        _apply_mouse(qtile, new['mouse'])
+    if 'layouts' in applied:
+        qtile.config.layouts = new['layouts']
+    if 'floating_layout' in applied:
+        _apply_floating_layout(qtile, new['floating_layout'])
+    if 'groups' in applied:
+        _apply_groups(qtile, new['groups'])
+    if 'layouts' in applied or 'groups' in applied:
+        configured = {group.name: group for group in qtile.config.groups}
+        for group in qtile.groups:
+            if isinstance(group, ScratchPad):
+                continue
+            # Groups with layouts of their own get new ones when the groups change.
+            custom = getattr(configured.get(group.name), 'layouts', None)
+            if 'layouts' in applied or custom:
+                _relayout(group, custom or qtile.config.layouts)
+    if 'screens' in applied:
+        _apply_screens(qtile, new['screens'])
+    for screen in qtile.screens:
+        if screen.group is not None:
+            screen.group.layout_all()
+    return applied
+
+
+def reload_config(qtile):
+    """
+    Re-import the config modules that changed and apply them to the running Qtile.
+    Bind it with lazy.function(reload_config).
+    """
+    start = time.perf_counter()
+    modules = _modules()
+    changed = sorted(
+        name for name, module in modules.items()
+        if _mtimes.setdefault(name, _mtime(module)) != _mtime(module)
+    )
+    if not changed:
+        logger.info('Config reload: nothing changed')
+        return
+    if __name__ in changed:
+        logger.warning(f'{__name__} changed, restart Qtile to use it')
+        changed.remove(__name__)
+        if not changed:
+            return
+
+    # Check the changed files before re-importing anything, so that a typo does not
+    # leave the config half reloaded.
+    for name in changed:
+        path = modules[name].__file__
+        try:
+            with open(path) as f:
+                compile(f.read(), path, 'exec')
+        except SyntaxError:
+            logger.exception(f'Not reloading the config, {name} has a syntax error')
+            return
+
+    order = [name for name in _to_reload(modules, changed) if name != __name__]
+    root = modules[_ROOT]
+    old = {name: getattr(root, name, None) for name in _BINDINGS}
+    try:
+        for name in order:
+            _shut_down(name)
+            importlib.reload(modules[name])
+            _mtimes[name] = _mtime(modules[name])
+    except Exception:
+        logger.exception(f'Reloading the config failed at {name}, restart Qtile')
+        return
+    applied = _apply(qtile, old, root)
+    qtile.conn.flush()
+
+    logger.info(
+        f'Config reload: re-imported {", ".join(order)}; applied '
+        f'{", ".join(applied) or "nothing"} in '
+        f'{(time.perf_counter() - start) * 1000:.1f}ms'
+    )
@@ -0,0 +1,94 @@
+"""
+Importing the config package loads the whole config, which needs a running Qtile, so
+the packages under config/ are registered here without running their __init__ and the
+tests import single modules from them.
+
+Where Qtile, xcffib or cairocffi are not installed, they are replaced by stand-in
+modules in which every attribute is a class that accepts any arguments. That is enough
+to import the modules that are tested; the tests only use code that does not need them.
+"""
+import importlib.abc
+import importlib.machinery
+import importlib.util
+import logging
+import sys
+import tempfile
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+class _Subscribe:
+    # Hook decorators return the function unchanged, as Qtile's do.
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return lambda func: func
+
+
+# Attributes that the tested modules use while they are imported.
+_OVERRIDES = {
+    'libqtile.hook': {'subscribe': _Subscribe()},
+    'libqtile.log_utils': {'logger': logging.getLogger('libqtile')},
+    'libqtile.utils': {'get_cache_dir': tempfile.gettempdir},
+}
+
+
+class _Stub(type):
+    def __getattr__(cls, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        return _stub(name)
+
+
+def _stub(name):
+    return _Stub(name, (), {'__init__': lambda self, *args, **kwargs: None})
+
+
+class _StubModule(types.ModuleType):
+    def __getattr__(self, name):
+        if name.startswith('__'):
+            raise AttributeError(name)
+        if f'{self.__name__}.{name}' in _OVERRIDES:
+            # So that `from libqtile import hook` gets the overridden module.
+            value = importlib.import_module(f'{self.__name__}.{name}')
+        else:
+            value = _stub(name)
+        setattr(self, name, value)
+        return value
+
+
+class _StubFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    def __init__(self, roots):
+        self.roots = roots
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname.partition('.')[0] in self.roots:
+            return importlib.machinery.ModuleSpec(fullname, self, is_package=True)
+        return None
+
+    def create_module(self, spec):
+        module = _StubModule(spec.name)
+        module.__dict__.update(_OVERRIDES.get(spec.name, {}))
+        return module
+
+    def exec_module(self, module):
+        pass
+
+
+def _stub_missing(*roots):
+    missing = {root for root in roots if importlib.util.find_spec(root) is None}
+    if missing:
+        sys.meta_path.append(_StubFinder(missing))
+
+
+def _register_packages():
+    for init in sorted(ROOT.joinpath('config').glob('**/__init__.py')):
+        name = '.'.join(init.parent.relative_to(ROOT).parts)
+        spec = importlib.machinery.ModuleSpec(name, None, is_package=True)
+        spec.submodule_search_locations = [str(init.parent)]
+        sys.modules.setdefault(name, importlib.util.module_from_spec(spec))
+
+
+_stub_missing('libqtile', 'xcffib', 'cairocffi')
+_register_packages()
@@ -0,0 +1,83 @@
+from types import SimpleNamespace
+
+from config.bar.damage import Bar
+
+
+class FakeWidget:
+    def __init__(self, length):
+        self.length = length
+        self.offset = 0
+        self.height = 24
+        self.draws = 0
+
+    @property
+    def width(self):
+        return self.length
+
+    def draw(self):
+        self.draws += 1
+
+
+def _bar(*lengths):
+    widgets = [FakeWidget(length) for length in lengths]
+    bar = Bar(widgets, 24)
+    bar.widgets = widgets
+    bar.length = 1000
+    bar.horizontal = True
+    bar.queued_draws = 0
+    bar.qtile = SimpleNamespace(call_soon=lambda func: None)
+    bar.drawer = SimpleNamespace(draws=[])
+    bar.drawer.draw = lambda **kwargs: bar.drawer.draws.append(kwargs)
+    bar._resize = _resize
+    return bar, widgets
+
+
+def _resize(length, widgets):
+    # Widgets are laid out one after the other, as Qtile's Bar does.
+    offset = 0
+    for widget in widgets:
+        widget.offset = offset
+        offset += widget.length
+
+
+def _draws(widgets):
+    return [widget.draws for widget in widgets]
+
+
+def test_only_damaged_widgets_are_drawn():
+    bar, widgets = _bar(100, 50, 200)
+    bar._actual_draw()
+    assert _draws(widgets) == [1, 1, 1]
+    # The rest of the bar past the last widget is cleared.
+    assert bar.drawer.draws == [{'offsetx': 350, 'width': 650}]
+
+    bar.damage(widgets[1])
+    bar.damage(widgets[1])
+    assert bar.queued_draws == 2
+    bar._actual_draw()
+    assert _draws(widgets) == [1, 2, 1]
+    assert len(bar.drawer.draws) == 1
+    assert bar.cmd_damage_info()['partial_draws'] == 1
+    assert bar.cmd_damage_info()['area'] == 350 * 24 + 50 * 24
+
+
+def test_length_change_redraws_everything():
+    bar, widgets = _bar(100, 50, 200)
+    bar._actual_draw()
+    widgets[1].length = 80
+    bar.damage(widgets[1])
+    bar._actual_draw()
+    assert _draws(widgets) == [2, 2, 2]
+    assert bar.drawer.draws[-1] == {'offsetx': 380, 'width': 620}
+    info = bar.cmd_damage_info()
+    assert (info['full_draws'], info['partial_draws'], info['widget_draws']) == (2, 0, 6)
+
+
+def test_draw_redraws_everything():
+    bar, widgets = _bar(100, 50)
+    bar._actual_draw()
+    bar.damage(widgets[0])
+    # Something else, like an expose event, asks for the whole bar.
+    bar.draw()
+    bar._actual_draw()
+    assert _draws(widgets) == [2, 2]
@@ -0,0 +1,75 @@
+from config.qtools.borders.cache import PixmapCache
+
+
+class FakeCore:
+    def __init__(self):
+        self.freed = []
+
+    def FreePixmap(self, pixmap):
+        self.freed.append(pixmap)
+
+
+def test_get_counts_hits_and_misses():
+    cache = PixmapCache(budget=100)
+    core = FakeCore()
+    assert cache.get('a') is None
+    cache.put(core, 'a', 1, 10)
+    assert cache.get('a') == 1
+    assert cache.info()['hits'] == 1
+    assert cache.info()['misses'] == 1
+
+
+def test_evicts_least_recently_used_within_budget():
+    cache = PixmapCache(budget=30)
+    core = FakeCore()
+    for key, pixmap in (('a', 1), ('b', 2), ('c', 3)):
+        assert cache.put(core, key, pixmap, 10)
+    cache.get('a')
+    cache.put(core, 'd', 4, 10)
+
+    assert core.freed == [2]
+    assert cache.get('b') is None
+    assert [cache.get(key) for key in 'acd'] == [1, 3, 4]
+    assert cache.size == 30
+    assert cache.info()['evictions'] == 1
+
+
+def test_large_pixmap_evicts_several():
+    cache = PixmapCache(budget=30)
+    core = FakeCore()
+    for key, pixmap in (('a', 1), ('b', 2), ('c', 3)):
+        cache.put(core, key, pixmap, 10)
+    cache.put(core, 'd', 4, 25)
+    assert core.freed == [1, 2, 3]
+    assert cache.size == 25
+
+
+def test_too_large_is_not_cached():
+    cache = PixmapCache(budget=30)
+    core = FakeCore()
+    cache.put(core, 'a', 1, 10)
+    assert not cache.put(core, 'b', 2, 31)
+    assert core.freed == []
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+
+
+def test_replacing_a_key_frees_the_old_pixmap():
+    cache = PixmapCache(budget=30)
+    core = FakeCore()
+    cache.put(core, 'a', 1, 10)
+    cache.put(core, 'a', 2, 20)
+    assert core.freed == [1]
+    assert cache.get('a') == 2
+    assert cache.size == 20
+
+
+def test_clear_frees_everything():
+    cache = PixmapCache(budget=30)
+    core = FakeCore()
+    cache.put(core, 'a', 1, 10)
+    cache.put(core, 'b', 2, 10)
+    cache.clear()
+    assert core.freed == [1, 2]
+    assert cache.size == 0
+    assert cache.info()['entries'] == 0
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+
+import pytest
+
+from config.qtools.borders import borders
+
+
+@pytest.fixture(autouse=True)
+def painted(monkeypatch):
+    monkeypatch.setattr(borders, '_painted', {})
+    monkeypatch.setattr(borders, '_counts', {'painted': 0, 'skipped': 0})
+
+
+def _style():
+    calls = []
+
+    def style(window, colors, borderwidth, width, height):
+        calls.append((window.wid, colors, borderwidth))
+
+    return borders._tracked(style), calls
+
+
+def test_unchanged_border_is_skipped():
+    paint, calls = _style()
+    window = SimpleNamespace(wid=1)
+    paint(window, '#ff0000', 2, 100, 50)
+    paint(window, '#ff0000', 2, 100, 50)
+    assert calls == [(1, '#ff0000', 2)]
+    assert borders.repaint_info() == {'painted': 1, 'skipped': 1, 'windows': 1}
+
+
+def test_changed_colour_width_or_size_is_painted():
+    paint, calls = _style()
+    window = SimpleNamespace(wid=1)
+    paint(window, ['#ff0000', '#000000'], 2, 100, 50)
+    paint(window, ['#ff0000', '#000000'], 2, 100, 50)
+    paint(window, ['#00ff00', '#000000'], 2, 100, 50)
+    paint(window, ['#00ff00', '#000000'], 3, 100, 50)
+    paint(window, ['#00ff00', '#000000'], 3, 120, 50)
+    assert len(calls) == 4
+    assert borders.repaint_info() == {'painted': 4, 'skipped': 1, 'windows': 1}
+
+
+def test_killed_window_is_forgotten():
+    paint, calls = _style()
+    window = SimpleNamespace(wid=1)
+    paint(window, '#ff0000', 2, 100, 50)
+    paint(SimpleNamespace(wid=2), '#ff0000', 2, 100, 50)
+    borders._forget(SimpleNamespace(window=window))
+    assert borders.repaint_info()['windows'] == 1
+    # A new window with the same id is painted.
+    paint(window, '#ff0000', 2, 100, 50)
+    assert len(calls) == 3
@@ -0,0 +1,35 @@
+import struct
+import zlib
+
+from config.apps.capture import encode_png
+
+
+def _chunks(png):
+    assert png[:8] == b'\x89PNG\r\n\x1a\n'
+    offset = 8
+    while offset < len(png):
+        length, kind = struct.unpack('>I4s', png[offset:offset + 8])
+        data = png[offset + 8:offset + 8 + length]
+        crc, = struct.unpack('>I', png[offset + 8 + length:offset + 12 + length])
+        assert crc == zlib.crc32(kind + data)
+        yield kind, data
+        offset += 12 + length
+
+
+def test_encodes_rgb_rows():
+    rgb = bytes(range(2 * 3 * 3))
+    chunks = list(_chunks(encode_png(3, 2, rgb)))
+
+    assert [kind for kind, _ in chunks] == [b'IHDR', b'IDAT', b'IEND']
+    width, height, depth, colour, *_ = struct.unpack('>IIBBBBB', chunks[0][1])
+    assert (width, height, depth, colour) == (3, 2, 8, 2)
+    # Each row starts with filter type 0, none.
+    assert zlib.decompress(chunks[1][1]) == b'\0' + rgb[:9] + b'\0' + rgb[9:]
+    assert chunks[2][1] == b''
+
+
+def test_compression_level_does_not_change_pixels():
+    rgb = bytes(64 * 64 * 3)
+    fast, small = encode_png(64, 64, rgb, level=1), encode_png(64, 64, rgb, level=9)
+    assert zlib.decompress(dict(_chunks(fast))[b'IDAT']) == \
+        zlib.decompress(dict(_chunks(small))[b'IDAT'])
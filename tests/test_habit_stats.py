@@ -0,0 +1,180 @@
+import json
+import os
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from config.qtools.widget import habit_tracker
+from config.qtools.widget.habit_tracker import (
+    _WINDOW, HabitTracker, _HabitStats, _HabitStore,
+)
+
+
+def _stats(days):
+    stats = _HabitStats()
+    start = date(2021, 1, 1)
+    for i, kept in enumerate(days):
+        stats.add(start + timedelta(days=i), kept)
+    return stats
+
+
+def test_streaks_and_breaks():
+    stats = _stats([True, True, False, True, True, True, False, False, True])
+    assert stats.days == 9
+    assert stats.kept == 6
+    assert stats.current == 1
+    assert stats.longest == 3
+    # Missing a day only breaks a chain that was going.
+    assert stats.breaks == 2
+    assert stats.last == date(2021, 1, 9)
+
+
+def test_rate_of_recent_days():
+    stats = _stats([False, True, True, False])
+    assert stats.rate(1) == 0.0
+    assert stats.rate(2) == 0.5
+    assert stats.rate(3) == 2 / 3
+    # More days than were logged only counts those that were.
+    assert stats.rate(10) == 0.5
+
+
+def test_rate_without_days():
+    assert _HabitStats().rate(7) == 0.0
+
+
+def test_recent_window_is_bounded():
+    stats = _stats([False] * 5 + [True] * (_WINDOW + 5))
+    assert stats.recent == (1 << _WINDOW) - 1
+    assert stats.rate(_WINDOW) == 1.0
+    assert stats.current == stats.longest == _WINDOW + 5
+
+
+def _log_days(store, habit):
+    HabitTracker._log_days(SimpleNamespace(_store=store, habit=habit))
+
+
+def test_chain_start_day_is_kept(tmp_path):
+    store = _HabitStore(str(tmp_path / 'habits.json'), 1)
+    store.data['run'] = (date.today() - timedelta(days=3)).isoformat()
+    _log_days(store, 'run')
+
+    stats = store.stats('run')
+    assert stats.days == 3
+    assert stats.kept == 3
+    assert stats.breaks == 0
+    assert stats.current == 3
+    assert stats.rate(3) == 1.0
+
+
+def test_days_before_a_restarted_chain_are_broken(tmp_path):
+    store = _HabitStore(str(tmp_path / 'habits.json'), 1)
+    today = date.today()
+    store.log('run', today - timedelta(days=5), True)
+    # The chain was reset two days ago.
+    store.data['run'] = (today - timedelta(days=2)).isoformat()
+    _log_days(store, 'run')
+
+    stats = store.stats('run')
+    assert stats.days == 5
+    assert stats.breaks == 1
+    assert stats.current == 2
+    assert stats.rate(4) == 0.5
+
+
+class FakeQtile:
+    """Records the timers and executor jobs that Qtile would run."""
+
+    def __init__(self):
+        self.timers = []
+        self.jobs = []
+
+    def call_later(self, delay, func):
+        timer = SimpleNamespace(delay=delay, func=func, cancelled=False)
+        timer.cancel = lambda: setattr(timer, 'cancelled', True)
+        self.timers.append(timer)
+        return timer
+
+    def run_in_executor(self, func, *args):
+        self.jobs.append(lambda: func(*args))
+
+    def fire(self):
+        timers, self.timers = self.timers, []
+        for timer in timers:
+            if not timer.cancelled:
+                timer.func()
+
+
+@pytest.fixture
+def fake_qtile(monkeypatch):
+    fake = FakeQtile()
+    monkeypatch.setattr(habit_tracker, 'qtile', fake)
+    return fake
+
+
+def _read(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def test_changes_are_written_once(tmp_path, fake_qtile, monkeypatch):
+    replaced = []
+    os_replace = os.replace
+
+    def replace(src, dst):
+        replaced.append(dst)
+        os_replace(src, dst)
+
+    monkeypatch.setattr(habit_tracker.os, 'replace', replace)
+    path = tmp_path / 'habits.json'
+    store = _HabitStore(str(path), 5)
+    store['run'] = '2021-01-01'
+    store['read'] = '2021-01-02'
+    store['run'] = '2021-01-03'
+    assert [timer.delay for timer in fake_qtile.timers] == [5]
+
+    fake_qtile.fire()
+    assert len(fake_qtile.jobs) == 1
+    assert not path.exists()
+    fake_qtile.jobs.pop()()
+    assert _read(path) == {'run': '2021-01-03', 'read': '2021-01-02'}
+    # The file is written next to the chain file and renamed into place.
+    assert replaced == [str(path)]
+    assert [p.name for p in tmp_path.iterdir()] == ['habits.json']
+
+    # Setting a habit to the value it has does not schedule another write.
+    store['run'] = '2021-01-03'
+    assert fake_qtile.timers == []
+
+
+def test_older_writes_are_skipped(tmp_path, fake_qtile):
+    path = tmp_path / 'habits.json'
+    store = _HabitStore(str(path), 5)
+    store['run'] = '2021-01-01'
+    fake_qtile.fire()
+    store['run'] = '2021-01-02'
+    fake_qtile.fire()
+    older, newer = fake_qtile.jobs
+    newer()
+    older()
+    assert _read(path) == {'run': '2021-01-02'}
+
+
+def test_pending_changes_are_flushed_at_shutdown(tmp_path, fake_qtile, monkeypatch):
+    path = tmp_path / 'habits.json'
+    store = _HabitStore(str(path), 5)
+    monkeypatch.setattr(_HabitStore, '_stores', {str(path): store})
+    store.setdefault('run', '2021-01-01')
+    store.log('run', date(2021, 1, 1), True)
+    store['read'] = '2021-01-01'
+    timer, = fake_qtile.timers
+
+    habit_tracker._flush_stores()
+    assert timer.cancelled
+    assert fake_qtile.jobs == []
+    assert _read(path) == {'run': '2021-01-01', 'read': '2021-01-01'}
+    assert json.loads((tmp_path / 'habits.log').read_text()) == {
+        'habit': 'run', 'date': '2021-01-01', 'kept': True
+    }
+    # Reading the store again finds what was written.
+    assert _HabitStore(str(path), 5).stats('run').kept == 1
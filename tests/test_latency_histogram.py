@@ -0,0 +1,51 @@
+import pytest
+
+from config.mappings import latency
+from config.mappings.latency import BUCKETS, Histogram
+
+
+def test_buckets_double_in_width():
+    histogram = Histogram()
+    for seconds in (100e-6, 124e-6, 200e-6, 300e-6, 60.0, 1000.0):
+        histogram.add(seconds)
+    assert list(histogram.counts[:4]) == [2, 1, 1, 0]
+    # Anything past the last bucket is counted in it.
+    assert histogram.counts[BUCKETS - 1] == 2
+    assert histogram.count == 6
+    assert histogram.max == 1000.0
+    assert histogram.last == 1000.0
+
+
+def test_percentile_is_a_bucket_bound():
+    histogram = Histogram()
+    for _ in range(90):
+        histogram.add(100e-6)
+    for _ in range(10):
+        histogram.add(3e-3)
+    assert histogram.percentile(50) == pytest.approx(125e-6)
+    assert histogram.percentile(95) == pytest.approx(3e-3)
+    # The bound of the top bucket is never more than the slowest time seen.
+    histogram.add(3.1e-3)
+    assert histogram.percentile(100) == pytest.approx(3.1e-3)
+
+
+def test_summary():
+    histogram = Histogram()
+    assert histogram.summary()['mean_ms'] == 0.0
+    histogram.add(1e-3)
+    histogram.add(3e-3)
+    summary = histogram.summary()
+    assert summary['count'] == 2
+    assert summary['mean_ms'] == pytest.approx(2.0)
+    assert summary['max_ms'] == pytest.approx(3.0)
+    assert summary['last_ms'] == pytest.approx(3.0)
+
+
+def test_stats_are_slowest_first(monkeypatch):
+    fast, slow, unused = Histogram(), Histogram(), Histogram()
+    fast.add(1e-4)
+    slow.add(1e-2)
+    monkeypatch.setattr(
+        latency, 'histograms', {'M-a: fast': fast, 'M-b: slow': slow, 'M-c': unused}
+    )
+    assert list(latency.stats()) == ['M-b: slow', 'M-a: fast']
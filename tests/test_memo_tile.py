@@ -0,0 +1,117 @@
+from config.layouts.tile import MemoTile, _tile
+
+
+class FakeClient:
+    """Places itself the way Qtile's Window.place does, and records what was done."""
+
+    def __init__(self, has_focus=False):
+        self.has_focus = has_focus
+        self.hidden = True
+        self.x = self.y = self.width = self.height = self.borderwidth = 0
+        self.bordercolor = None
+        self.calls = []
+
+    def place(self, x, y, width, height, borderwidth, bordercolor, margin=0):
+        if isinstance(margin, int):
+            margin = [margin] * 4
+        self.x, self.y = x + margin[3], y + margin[0]
+        self.width = width - margin[1] - margin[3]
+        self.height = height - margin[0] - margin[2]
+        self.borderwidth, self.bordercolor = borderwidth, bordercolor
+        self.calls.append('place')
+
+    def paint_borders(self, colour, width):
+        self.bordercolor = colour
+        self.calls.append('paint')
+
+    def unhide(self):
+        self.hidden = False
+
+    def hide(self):
+        self.hidden = True
+
+
+def _layout(border_width=1, margin=0, **config):
+    # Only the attributes the geometry needs, without a group or a running Qtile.
+    layout = object.__new__(MemoTile)
+    defaults = {name: value for name, value, _ in MemoTile.defaults}
+    defaults.update(config, border_width=border_width, margin=margin)
+    vars(layout).update(defaults)
+    layout.placed = layout.repainted = layout.skipped = 0
+    return layout
+
+
+def test_master_and_stack():
+    assert _tile(3, 1, 0, 0, 1000, 600, 0.6, True) == (
+        (0, 0, 600, 600),
+        (600, 0, 400, 300),
+        (600, 300, 400, 300),
+    )
+
+
+def test_masters_split_the_height():
+    assert _tile(3, 2, 10, 20, 1000, 600, 0.5, True) == (
+        (10, 20, 500, 300),
+        (10, 320, 500, 300),
+        (510, 20, 500, 600),
+    )
+
+
+def test_expand_without_a_stack():
+    assert _tile(1, 1, 0, 0, 1000, 600, 0.6, True) == ((0, 0, 1000, 600),)
+    assert _tile(2, 3, 0, 0, 1000, 600, 0.6, False) == (
+        (0, 0, 600, 300),
+        (0, 300, 600, 300),
+    )
+
+
+def test_target_allows_for_borders_and_margins():
+    assert _layout(border_width=2, margin=5)._target((0, 0, 100, 50)) == (5, 5, 86, 36)
+    assert _layout(border_width=1, margin=[1, 2, 3, 4])._target((0, 0, 100, 50)) == (
+        4, 1, 92, 44
+    )
+
+
+def test_unchanged_windows_are_skipped():
+    layout = _layout(border_width=2, margin=[1, 2, 3, 4])
+    client = FakeClient(has_focus=True)
+    rect = (0, 0, 600, 600)
+
+    layout._place(client, rect)
+    assert (client.x, client.y, client.width, client.height) == layout._target(rect)
+    assert not client.hidden
+
+    layout._place(client, rect)
+    assert client.calls == ['place']
+    assert (layout.placed, layout.skipped) == (1, 1)
+
+
+def test_focus_change_only_repaints():
+    layout = _layout()
+    client = FakeClient(has_focus=True)
+    layout._place(client, (0, 0, 600, 600))
+    client.has_focus = False
+    layout._place(client, (0, 0, 600, 600))
+    assert client.calls == ['place', 'paint']
+    assert client.bordercolor == layout.border_normal
+    assert layout.repainted == 1
+
+
+def test_moved_or_hidden_windows_are_placed():
+    layout = _layout()
+    client = FakeClient()
+    layout._place(client, (0, 0, 600, 600))
+    layout._place(client, (0, 0, 500, 600))
+    client.hide()
+    layout._place(client, (0, 0, 500, 600))
+    assert client.calls == ['place'] * 3
+    assert not client.hidden
+
+
+def test_border_width_change_is_placed():
+    layout = _layout(border_width=1)
+    client = FakeClient()
+    layout._place(client, (0, 0, 600, 600))
+    layout.border_width = 3
+    layout._place(client, (0, 0, 600, 600))
+    assert client.calls == ['place', 'place']
@@ -0,0 +1,76 @@
+import asyncio
+
+import pytest
+
+from config.apps.pulse import PulseVolume, _Pactl
+
+# A stand-in for pactl that keeps the sink's state in files and logs every command.
+# Setting the volume takes a moment, so that presses can arrive while it runs.
+_PACTL = '''\
+#!/bin/sh
+cd "$(dirname "$0")"
+[ "$1" = --server ] && shift 2
+echo "$@" >> log
+case "$1" in
+    get-sink-volume) echo "Volume: front-left: 0 /  $(cat volume)% / 0 dB" ;;
+    get-sink-mute) echo "Mute: $(cat mute)" ;;
+    set-sink-volume) sleep 0.2; echo "${3%\\%}" > volume ;;
+    set-sink-mute) [ "$3" = 1 ] && echo yes > mute || echo no > mute ;;
+    subscribe) exec sleep 60 ;;
+esac
+'''
+
+
+@pytest.fixture
+def pactl(tmp_path, monkeypatch):
+    script = tmp_path / 'pactl'
+    script.write_text(_PACTL)
+    script.chmod(0o755)
+    (tmp_path / 'volume').write_text('50\n')
+    (tmp_path / 'mute').write_text('no\n')
+    monkeypatch.setenv('PATH', str(tmp_path), prepend=':')
+    return tmp_path
+
+
+def _commands(pactl, name):
+    return [line for line in (pactl / 'log').read_text().splitlines()
+            if line.startswith(name)]
+
+
+def test_presses_are_coalesced(pactl):
+    async def presses():
+        volume = PulseVolume(step=5, backend=_Pactl('local-test'))
+        states = []
+        volume.subscribe(lambda *state: states.append(state))
+        try:
+            volume.up()
+            volume.up()
+            volume.mute()
+            volume.mute()
+            await asyncio.sleep(0.1)
+            # These arrive while the first change is still being made.
+            volume.up()
+            volume.down()
+            volume.up()
+            while volume._task is not None and not volume._task.done():
+                await asyncio.sleep(0.05)
+        finally:
+            volume.stop()
+        return states
+
+    states = asyncio.run(presses())
+    assert states[-1] == (65, False)
+    assert _commands(pactl, 'set-sink-volume') == [
+        'set-sink-volume @DEFAULT_SINK@ 60%', 'set-sink-volume @DEFAULT_SINK@ 65%'
+    ]
+    # Muting twice cancels out, so the mute state is never sent.
+    assert _commands(pactl, 'set-sink-mute') == []
+    assert (pactl / 'volume').read_text().strip() == '65'
+
+
+def test_only_what_changed_is_sent(pactl):
+    backend = _Pactl(None)
+    assert backend.get() == (50, False)
+    backend.set(muted=True)
+    assert _commands(pactl, 'set-') == ['set-sink-mute @DEFAULT_SINK@ 1']
+    assert backend.get() == (50, True)
@@ -0,0 +1,72 @@
+from pathlib import Path
+from types import SimpleNamespace
+
+from config.reload import _imports, _to_reload
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def _modules(root, package):
+    """Stand-ins for the imported modules of the package at root/package"""
+    modules = {}
+    for path in sorted(root.joinpath(package).glob('**/*.py')):
+        parts = path.relative_to(root).with_suffix('').parts
+        if parts[-1] == '__init__':
+            name = '.'.join(parts[:-1])
+            parent = name
+        else:
+            name = '.'.join(parts)
+            parent = name.rpartition('.')[0]
+        modules[name] = SimpleNamespace(
+            __name__=name, __file__=str(path), __package__=parent
+        )
+    return modules
+
+
+def _write(root, files):
+    for name, source in files.items():
+        path = root.joinpath(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(source)
+
+
+def test_imports(tmp_path):
+    _write(tmp_path, {
+        'pkg/__init__.py': 'from .a import thing\nVALUE = 1\n',
+        'pkg/a.py': 'import os\nthing = 1\n',
+        'pkg/b.py': 'from . import a\n',
+        'pkg/c.py': 'from . import a, VALUE\n',
+        'pkg/sub/__init__.py': '',
+        'pkg/sub/d.py': 'import pkg.b\nfrom ..a import thing\n',
+    })
+    modules = _modules(tmp_path, 'pkg')
+    assert _imports(modules['pkg'], modules) == {'pkg.a'}
+    assert _imports(modules['pkg.a'], modules) == set()
+    # Importing only submodules does not depend on the package itself.
+    assert _imports(modules['pkg.b'], modules) == {'pkg.a'}
+    assert _imports(modules['pkg.c'], modules) == {'pkg', 'pkg.a'}
+    assert _imports(modules['pkg.sub.d'], modules) == {'pkg.a', 'pkg.b'}
+
+
+def test_importers_are_reloaded_after_their_imports(tmp_path):
+    _write(tmp_path, {
+        'pkg/__init__.py': 'from .top import value\n',
+        'pkg/top.py': 'from .middle import value\n',
+        'pkg/middle.py': 'from .leaf import value\n',
+        'pkg/leaf.py': 'value = 1\n',
+        'pkg/other.py': 'value = 2\n',
+    })
+    modules = _modules(tmp_path, 'pkg')
+    assert _to_reload(modules, ['pkg.leaf']) == [
+        'pkg.leaf', 'pkg.middle', 'pkg.top', 'pkg'
+    ]
+    assert _to_reload(modules, ['pkg.other']) == ['pkg.other']
+
+
+def test_config_widgets_do_not_reload_key_bindings():
+    modules = _modules(ROOT, 'config')
+    order = _to_reload(modules, ['config.bar.widgets'])
+    assert order[0] == 'config.bar.widgets'
+    assert order[-1] == 'config'
+    assert order.index('config.bar') < order.index('config.screens')
+    assert not any(name.startswith('config.mappings') for name in order)
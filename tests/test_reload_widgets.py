@@ -0,0 +1,125 @@
+from types import SimpleNamespace
+
+import pytest
+
+from config import reload
+from config.reload import _apply_widgets, _comparable, _remember_widgets, _same_widget
+
+
+class FakeWidget:
+    """Keeps its keyword arguments the way Configurable does, and records its life."""
+
+    def __init__(self, **config):
+        self._user_config = config
+        self.name = type(self).__name__.lower()
+        self.configured = self.finalized = False
+
+    def _test_orientation_compatibility(self, horizontal):
+        pass
+
+    def _configure(self, qtile, bar):
+        self.configured = True
+        self.bar = bar
+
+    def finalize(self):
+        self.finalized = True
+
+
+class Clock(FakeWidget):
+    pass
+
+
+class Volume(FakeWidget):
+    pass
+
+
+def _function(source, name='f'):
+    # A fresh function each time, as a re-imported module would define.
+    namespace = {}
+    exec(source, namespace)
+    return namespace[name]
+
+
+@pytest.fixture(autouse=True)
+def hooks(monkeypatch):
+    monkeypatch.setattr(reload, 'hook', SimpleNamespace(subscriptions={}))
+    monkeypatch.setattr(reload, '_widgets', reload.weakref.WeakKeyDictionary())
+
+
+def _bar(widgets):
+    bar = SimpleNamespace(widgets=list(widgets), horizontal=True, drawn=0)
+    bar.draw = lambda: setattr(bar, 'drawn', bar.drawn + 1)
+    return bar
+
+
+def _qtile(widgets):
+    qtile = SimpleNamespace(widgets_map={w.name: w for w in widgets})
+    qtile.register_widget = lambda w: qtile.widgets_map.setdefault(w.name, w)
+    return qtile
+
+
+def _loaded(*widgets):
+    """widgets as they are once the config was loaded and Qtile configured them"""
+    bar = _bar(widgets)
+    for widget in widgets:
+        widget._configure(None, bar)
+    _remember_widgets([SimpleNamespace(top=bar, bottom=None, left=None, right=None)])
+    return bar
+
+
+def test_reimported_functions_compare_equal():
+    source = 'def f():\n    return 1\n'
+    assert _function(source) is not _function(source)
+    assert _comparable({'f': _function(source)}) == _comparable({'f': _function(source)})
+    # Moving a function does not change it.
+    assert _comparable(_function(source)) == _comparable(_function('\n\n' + source))
+
+
+def test_edited_lambdas_differ():
+    before = _function('f = lambda: spawn("xterm")')
+    assert _comparable(before) == _comparable(_function('f = lambda: spawn("xterm")'))
+    assert _comparable(before) != _comparable(_function('f = lambda: spawn("urxvt")'))
+    assert _comparable(before) != _comparable(_function('f = lambda: run("xterm")'))
+    nested = 'f = lambda: (lambda: {})'
+    assert _comparable(_function(nested.format(1))) != _comparable(_function(nested.format(2)))
+
+
+def test_closures_and_defaults_are_compared():
+    factory = 'def f(command):\n    return lambda: spawn(command)\n'
+    assert _comparable(_function(factory)('a')) == _comparable(_function(factory)('a'))
+    assert _comparable(_function(factory)('a')) != _comparable(_function(factory)('b'))
+    assert _comparable(_function('f = lambda g=1: g')) != _comparable(
+        _function('f = lambda g=2: g')
+    )
+
+
+def test_same_widget():
+    callback = 'f = lambda: spawn("pavucontrol")'
+    old = Volume(step=5, mouse_callbacks={'Button3': _function(callback)})
+    _loaded(old)
+    assert _same_widget(old, Volume(step=5, mouse_callbacks={'Button3': _function(callback)}))
+    assert not _same_widget(old, Volume(step=10, mouse_callbacks={}))
+    assert not _same_widget(
+        old, Volume(step=5, mouse_callbacks={'Button3': _function('f = lambda: spawn("x")')})
+    )
+    assert not _same_widget(old, Clock(step=5, mouse_callbacks={}))
+    # Widgets that were not there when the config was loaded are never kept.
+    assert not _same_widget(Volume(step=5), Volume(step=5))
+
+
+def test_apply_widgets_keeps_replaces_and_retires():
+    clock, volume, spare = Clock(format='%H:%M'), Volume(step=5), Clock(format='%a')
+    bar = _loaded(clock, volume, spare)
+    qtile = _qtile([clock, volume])
+    new_clock, new_volume = Clock(format='%H:%M'), Volume(step=10)
+
+    _apply_widgets(qtile, bar, [new_volume, new_clock])
+
+    assert bar.widgets == [new_volume, clock]
+    assert bar.drawn == 1
+    assert clock.configured and not clock.finalized
+    assert not new_clock.configured
+    # The changed widget is replaced by its new version, and the unused one retired.
+    assert new_volume.configured and new_volume.bar is bar
+    assert volume.finalized and spare.finalized
+    assert qtile.widgets_map == {'clock': clock, 'volume': new_volume}
@@ -0,0 +1,52 @@
+import asyncio
+
+from config.qtools.rofi_searx.history import History
+
+
+def _add(history, *queries):
+    async def add():
+        for query in queries:
+            history.add(query)
+
+    asyncio.run(add())
+    # Writes are made in order by a single thread, so this waits for all of them.
+    History._executor.submit(lambda: None).result()
+
+
+def test_ranked_by_count_then_recency(tmp_path):
+    history = History(str(tmp_path / 'history'))
+    _add(history, 'python', 'qtile', 'pytest', 'qtile', 'python')
+    assert history.ranked() == ['python', 'qtile', 'pytest']
+    _add(history, 'pytest', 'pytest')
+    assert history.ranked() == ['pytest', 'python', 'qtile']
+
+
+def test_suggest_by_prefix(tmp_path):
+    history = History(str(tmp_path / 'history'))
+    _add(history, 'python', 'pytest', 'qtile', 'pytest', 'py')
+    assert history.suggest('py') == ['pytest', 'py', 'python']
+    assert history.suggest('pyt', limit=1) == ['pytest']
+    assert history.suggest('x') == []
+
+
+def test_history_is_persisted(tmp_path):
+    path = str(tmp_path / 'history')
+    _add(History(path), 'qtile', 'python', 'qtile')
+    history = History(path)
+    assert len(history) == 2
+    assert history.ranked() == ['qtile', 'python']
+
+
+def test_missing_file_is_empty(tmp_path):
+    history = History(str(tmp_path / 'missing'))
+    assert len(history) == 0
+    assert history.ranked() == []
+
+
+def test_file_is_compacted(tmp_path):
+    path = tmp_path / 'history'
+    _add(History(str(path)), *['qtile'] * 150)
+    lines = path.read_text().splitlines()
+    assert len(lines) < 150
+    assert History(str(path)).suggest() == ['qtile']
+    assert sum(int(line.split('\t')[0]) for line in lines) == 150
@@ -0,0 +1,124 @@
+import asyncio
+import random
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from config.qtools.rofi_searx.probe import Prober, Scores, http_probe
+
+
+def test_latency_is_a_moving_average():
+    scores = Scores(smoothing=0.5)
+    scores.success('a', 1.0)
+    scores.success('a', 0.5)
+    assert scores.table()[0]['latency'] == pytest.approx(0.75)
+
+
+def test_failures_raise_the_error_rate_and_successes_lower_it():
+    scores = Scores(smoothing=0.5)
+    scores.success('a', 1.0)
+    scores.failure('a', now=0)
+    assert scores.table()[0]['error_rate'] == pytest.approx(0.5)
+    scores.success('a', 1.0)
+    assert scores.table()[0]['error_rate'] == pytest.approx(0.25)
+
+
+def test_weight_favours_fast_and_reliable_instances():
+    scores = Scores()
+    scores.success('fast', 0.1)
+    scores.success('slow', 1.0)
+    scores.success('flaky', 0.1)
+    scores.failure('flaky', now=0)
+    assert scores.weight('unknown') is None
+    assert scores.weight('fast') > scores.weight('flaky') > scores.weight('slow')
+
+
+def test_quarantine_after_repeated_failures():
+    scores = Scores(max_failures=3, quarantine=100)
+    for _ in range(2):
+        scores.failure('a', now=0)
+    assert not scores.quarantined('a', now=0)
+    scores.failure('a', now=0)
+    assert scores.quarantined('a', now=99)
+    assert not scores.quarantined('a', now=100)
+    assert not scores.quarantined('unknown', now=0)
+
+
+def test_success_lifts_quarantine():
+    scores = Scores(max_failures=1, quarantine=100)
+    scores.failure('a', now=0)
+    scores.success('a', 0.2)
+    assert not scores.quarantined('a', now=1)
+
+
+def test_choose_skips_quarantined_instances():
+    random.seed(0)
+    scores = Scores(max_failures=1, quarantine=100)
+    scores.failure('a', now=0)
+    assert {scores.choose(['a', 'b'], now=1) for _ in range(20)} == {'b'}
+    # With every instance quarantined, any of them is chosen rather than none.
+    scores.failure('b', now=0)
+    assert scores.choose(['a', 'b'], now=1) in ('a', 'b')
+
+
+def test_table_is_fastest_first():
+    scores = Scores()
+    scores.success('slow', 2.0)
+    scores.failure('unknown', now=0)
+    scores.success('fast', 0.5)
+    assert [row['url'] for row in scores.table()] == ['fast', 'slow', 'unknown']
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # The slow instance answers once the test is over, well after the probe gave up.
+    released = threading.Event()
+
+    def do_GET(self):
+        if self.path == '/slow':
+            self.released.wait(5)
+        self.send_response(500 if self.path == '/failing' else 200)
+        self.end_headers()
+        self.wfile.write(b'searx')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """A local stand-in for three instances: a healthy, a failing and a slow one"""
+    _Handler.released.clear()
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+    httpd.daemon_threads = True
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    host, port = httpd.server_address
+    yield {name: f'http://{host}:{port}/{name}' for name in ('healthy', 'failing', 'slow')}
+    _Handler.released.set()
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_http_probe(server):
+    assert 0 <= http_probe(server['healthy'], 1) < 1
+    with pytest.raises(Exception):
+        http_probe(server['failing'], 1)
+    with pytest.raises(Exception):
+        http_probe(server['slow'], 0.2)
+
+
+def test_prober_scores_each_instance(server):
+    scores = Scores(max_failures=1, quarantine=100)
+    prober = Prober(scores, lambda: list(server.values()), timeout=0.2)
+    asyncio.run(prober.probe_all())
+    prober._executor.shutdown()
+
+    rows = {row['url']: row for row in scores.table()}
+    assert rows[server['healthy']]['latency'] < 0.2
+    assert rows[server['healthy']]['error_rate'] == 0.0
+    for name in ('failing', 'slow'):
+        assert rows[server[name]]['latency'] is None
+        assert rows[server[name]]['quarantined']
+    random.seed(0)
+    assert {scores.choose(list(server.values())) for _ in range(20)} == {server['healthy']}
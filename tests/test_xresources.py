@@ -0,0 +1,59 @@
+import pytest
+
+from config.qtools.xresources.xresources import Resources
+
+
+def test_tight_binding_beats_loose():
+    res = Resources('xterm*background: loose\nxterm.background: tight')
+    assert res.query('xterm.background') == 'tight'
+
+
+def test_name_beats_class_beats_any():
+    res = Resources('?.background: any\nXTerm.background: class\nxterm.background: name')
+    assert res.query('xterm.background', 'XTerm.Background') == 'name'
+    assert res.query('uxterm.background', 'XTerm.Background') == 'class'
+    assert res.query('st.background', 'St.Background') == 'any'
+
+
+def test_earlier_component_decides():
+    # Matching xterm at the first level beats skipping it, however specific the rest.
+    res = Resources('*vt100.background: vt100\nxterm*background: xterm')
+    assert res.query('xterm.vt100.background') == 'xterm'
+
+
+def test_loose_binding_skips_levels():
+    res = Resources('*background: all')
+    assert res.query('xterm.vt100.background') == 'all'
+    assert res.query('xterm.vt100.foreground') is None
+
+
+def test_default_and_mismatched_class():
+    res = Resources('st.font: mono')
+    assert res.query('st.color0', default='#000000') == '#000000'
+    with pytest.raises(ValueError):
+        res.query('st.font', 'St')
+
+
+def test_parse_continuations_and_comments():
+    res = Resources('! comment\n# also a comment\nst.font: mono\\\nspace\nbroken line')
+    assert res.query('st.font') == 'monospace'
+    assert len(res) == 1
+
+
+def test_insert_clears_memo():
+    res = Resources('*color1: #ff0000')
+    assert res.colour('st.color1') == '#ff0000'
+    res.insert('st.color1', '#00ff00')
+    assert res.colour('st.color1') == '#00ff00'
+
+
+def test_typed_lookups():
+    res = Resources(
+        '*color1: #abc\n*color2: rgb:ff/80/0\n*color3: nonsense\n'
+        '*borderWidth: 0x10\n*bold: Yes'
+    )
+    assert res.colour('st.color1') == '#aabbcc'
+    assert res.colour('st.color2') == '#ff8000'
+    assert res.colour('st.color3', default='#000000') == '#000000'
+    assert res.integer('st.borderWidth') == 16
+    assert res.boolean('st.bold') is True